@@ -4,13 +4,26 @@ import math
 
 import numpy as np
 
-from .planecoord import Line2D, LineSeg2D
+from .planecoord import Line2D, LineSeg2D, dist
+from .raycast import as_wall_array, cast_ray, cast_rays
+from .spatial import point_segment_dists, segment_dists
 
 np.set_printoptions(suppress=True)
 
+# the state of a car which changes while moving, to save many cars compactly
+CAR_STATE_DTYPE = np.dtype([('x', np.float64), ('y', np.float64),
+                            ('angle', np.float64),
+                            ('wheel_angle', np.float64),
+                            ('swept_collision', np.bool_)])
+
 
 class Car(object):
-    def __init__(self, pos, angle, radius, wall_points):
+    __slots__ = ('pos', 'angle', 'radius', 'wheel_angle', 'swept_collision',
+                 'precise', 'wall_array', 'wall_index', 'distance_field',
+                 'radar_table', '__walls')
+
+    def __init__(self, pos, angle, radius, wall_points, precise=False,
+                 wall_index=None, distance_field=None, radar_table=None):
         """The car controlled by fuzzy system.
 
         Args:
@@ -18,38 +31,121 @@ class Car(object):
             angle (float): the angle of the car in degree and always in
                 [0, 360).
             radius (int): the size (radius) of the car.
-            wall_points (list): a list with all the edge points of the map.
+            wall_points (list or ndarray): a list with all the edge points of
+                the map, or the (N, 4) array of wall segments from
+                `walls_to_array`, which is shared by the cars without copying.
+            precise (bool, optional): Defaults to False. If True, the walls and
+                radars are computed in `Decimal` precision.
+            wall_index (WallGrid, optional): Defaults to None. The spatial
+                index built from the same `wall_points`. If given, the radars
+                and collision check only test the walls near the car or the
+                radar, otherwise every wall is tested.
+            distance_field (DistanceField, optional): Defaults to None. The
+                distance field built from the same `wall_points`. If given, the
+                collision check and the clearance are looked up from it
+                instead of measuring the walls.
+            radar_table (RadarTable, optional): Defaults to None. The radar
+                distances precomputed from the same `wall_points`. If given,
+                the radars are interpolated from it within its `max_error`
+                wherever it can answer, and cast exactly elsewhere.
         """
 
         self.pos = list(pos)
         self.angle = angle % 360
         self.radius = radius
         self.wheel_angle = 0
-        self.walls = []
-        for idx in range(len(wall_points) - 1):
-            self.walls.append(
-                LineSeg2D(wall_points[idx], wall_points[idx + 1]))
+        self.swept_collision = False
+        self.precise = precise
+        self.wall_array = as_wall_array(wall_points)
+        self.__walls = None
+        self.wall_index = wall_index
+        self.distance_field = distance_field
+        self.radar_table = radar_table
+
+    @property
+    def walls(self):
+        """The `LineSeg2D` walls, which are only created on the first access
+        because the float computation uses `wall_array` instead."""
+
+        if self.__walls is None:
+            self.__walls = [LineSeg2D(tuple(wall[:2]), tuple(wall[2:]),
+                                      self.precise)
+                            for wall in self.wall_array.tolist()]
+        return self.__walls
+
+    @property
+    def state(self):
+        """The (x, y, angle, wheel_angle, swept_collision) of car, which is a
+        record of `CAR_STATE_DTYPE`. Setting it with a record or a tuple in the
+        same order restores the car."""
+
+        return np.array((self.pos[0], self.pos[1], self.angle,
+                         self.wheel_angle, self.swept_collision),
+                        dtype=CAR_STATE_DTYPE)[()]
+
+    @state.setter
+    def state(self, state):
+        self.pos = [float(state[0]), float(state[1])]
+        self.angle, self.wheel_angle = float(state[2]), float(state[3])
+        self.swept_collision = bool(state[4])
 
-    def move(self, wheel_angle):
+    def move(self, wheel_angle, step=1, max_substep=1):
         """Make the car move to mext position according to the current wheel
-        angle.
+        angle. The path is split into sub-steps, and the circle of car swept
+        along each sub-step is checked against the walls. The car stops at the
+        end of the first sub-step touching a wall, and `is_collided` is True
+        afterward.
 
         Args:
             wheel_angle (float): the current wheel angle which should be in
                 [-40, 40].
+            step (float, optional): Defaults to 1. The length of movement.
+            max_substep (float, optional): Defaults to 1. The longest length of
+                a sub-step. A sub-step is also not longer than
+                `radius / sin(wheel_angle)`, beyond which the car cannot turn.
         """
 
         self.wheel_angle = max(min(wheel_angle, 40), -40)
         wheel_angle = math.radians(self.wheel_angle)
-        car_angle = math.radians(self.angle)
+        substeps = substep_count(step, max_substep, self.wheel_angle,
+                                 self.radius)
+        length = step / substeps
 
-        self.pos[0] += math.cos(car_angle + wheel_angle) + \
-            math.sin(wheel_angle) * math.sin(car_angle)
-        self.pos[1] += math.sin(car_angle + wheel_angle) - \
-            math.sin(wheel_angle) * math.cos(car_angle)
-        self.angle = (
-            self.angle - math.degrees(math.asin(
-                math.sin(wheel_angle) / self.radius))) % 360
+        for _ in range(substeps):
+            car_angle = math.radians(self.angle)
+            start = tuple(self.pos)
+            self.pos[0] += length * (math.cos(car_angle + wheel_angle)
+                                     + math.sin(wheel_angle)
+                                     * math.sin(car_angle))
+            self.pos[1] += length * (math.sin(car_angle + wheel_angle)
+                                     - math.sin(wheel_angle)
+                                     * math.cos(car_angle))
+            # clipped against the rounding error of the longest sub-step
+            self.angle = (
+                self.angle - math.degrees(math.asin(max(min(
+                    length * math.sin(wheel_angle) / self.radius, 1), -1)))
+            ) % 360
+            if self.__sweep_collided(start):
+                self.swept_collision = True
+                break
+
+    def __sweep_collided(self, start):
+        """Check if the car touches any wall while moving from `start` to the
+        current position."""
+
+        if self.precise:
+            path = LineSeg2D(start, tuple(self.pos), self.precise)
+            return any(wall.seg_dist(path) <= self.radius
+                       for wall in self.walls)
+        if self.wall_index is not None:
+            center = ((start[0] + self.pos[0]) / 2,
+                      (start[1] + self.pos[1]) / 2)
+            walls = self.wall_index.walls_near(
+                center, self.radius + dist(start, self.pos) / 2)
+        else:
+            walls = self.wall_array
+        return bool(np.any(segment_dists(walls, start, self.pos)
+                           <= self.radius))
 
     def dist(self, direction):
         """Get the distance between car and any closest wall.
@@ -69,8 +165,31 @@ class Car(object):
         else:
             degree = (self.angle - 45) % 360
 
+        if self.precise:
+            return self.__precise_dist(degree)
+        if self.radar_table is not None:
+            distance = self.radar_table.distance(self.pos, degree)
+            if distance is not None:
+                if math.isnan(distance):
+                    return (None, '--')
+                radian = math.radians(degree)
+                return ((self.pos[0] + distance * math.cos(radian),
+                         self.pos[1] + distance * math.sin(radian)), distance)
+        if self.wall_index is not None:
+            intersection, distance = self.wall_index.cast_ray(self.pos, degree)
+        else:
+            intersection, distance = cast_ray(self.wall_array, self.pos, degree)
+        if intersection is None:
+            return (None, '--')
+        return (intersection, distance)
+
+    def __precise_dist(self, degree):
+        """Get the closest intersection of the radar in `degree` by the
+        `Decimal` lines."""
+
         radar = Line2D(self.pos, (self.pos[0] + math.cos(math.radians(degree)),
-                                  self.pos[1] + math.sin(math.radians(degree))))
+                                  self.pos[1] + math.sin(math.radians(degree))),
+                       precise=self.precise)
         intersections = []
         for wall in self.walls:
             inter = wall.intersection(radar)
@@ -86,20 +205,77 @@ class Car(object):
         return (min(intersections, key=lambda item: dist(self.pos, item)),
                 min(dist(self.pos, i) for i in intersections))
 
+    def scan(self, angles):
+        """Get the distances between car and the closest walls in many
+        directions at once, like a lidar. The walls are always computed in
+        float precision.
+
+        Args:
+            angles (array_like): the M directions of beams in degree, relative
+                to the angle of car (counterclockwise).
+
+        Returns:
+            tuple: (intersections, distances) in the shape of (M, 2) and (M,),
+            which are NaN for the beams hitting no wall.
+        """
+
+        angles = self.angle + np.asarray(angles, dtype=float)
+        if self.wall_index is not None:
+            return self.wall_index.cast_rays(self.pos, angles)
+        return cast_rays(self.wall_array, self.pos, angles)
+
     @property
     def is_collided(self):
-        """Check the car if it is collided against any walls or not.
+        """Check the car if it is collided against any walls or not, including
+        the walls touched along the path of the last movement.
 
         Returns:
             boolean: if the car is collided.
         """
 
-        for wall in self.walls:
-            if wall.point_dist(self.pos) <= self.radius:
-                return True
-        return False
+        if self.swept_collision:
+            return True
+        if self.precise:
+            return any(wall.point_dist(self.pos) <= self.radius
+                       for wall in self.walls)
+        if self.distance_field is not None:
+            return self.distance_field.distance(self.pos) <= self.radius
+        if self.wall_index is not None:
+            walls = self.wall_index.walls_near(self.pos, self.radius)
+        else:
+            walls = self.wall_array
+        return bool(np.any(point_segment_dists(walls, self.pos) <= self.radius))
+
+    @property
+    def clearance(self):
+        """Get the distance between the center of car and the closest wall.
+        It is negative if the car is out of a closed map when `distance_field`
+        is used.
+
+        Returns:
+            float: the distance to the closest wall.
+        """
+
+        if self.distance_field is not None:
+            return self.distance_field.distance(self.pos)
+        return float(np.min(point_segment_dists(self.wall_array, self.pos)))
+
+
+def substep_count(step, max_substep, wheel_angle, radius):
+    """Get the # of sub-steps splitting a movement, so that every sub-step is
+    not longer than `max_substep` or `radius / sin(wheel_angle)`.
+
+    Args:
+        step (float or ndarray): the length of movement.
+        max_substep (float): the longest length of a sub-step.
+        wheel_angle (float or ndarray): the wheel angle in degree.
+        radius (float): the size (radius) of car.
 
+    Returns:
+        int or ndarray: the # of sub-steps, which is at least 1.
+    """
 
-def dist(pt0, pt1):
-    """Return the distance between pt0 and pt1."""
-    return math.sqrt(sum(map(lambda a, b: (a - b)**2, pt0, pt1)))
+    turn = np.abs(np.sin(np.radians(wheel_angle))) / radius
+    count = np.maximum(np.ceil(step / max_substep), np.ceil(step * turn))
+    count = np.maximum(count, 1).astype(int)
+    return int(count) if count.ndim == 0 else count
@@ -0,0 +1,94 @@
+"""Define the exporters of the trajectory of a car. Every exporter accepts the
+records of `TRAJECTORY_DTYPE`, the saving directory and an optional progress
+callback, and returns the paths of the saved files. Only `export_train`
+reports the progress while saving chunk by chunk; the numpy formats are saved
+at once and report it only when they are done."""
+
+import os
+
+import numpy as np
+
+# the columns of the text formats
+TRAIN4D_COLUMNS = ('front_dist', 'right_dist', 'left_dist', 'wheel_angle')
+TRAIN6D_COLUMNS = ('x', 'y') + TRAIN4D_COLUMNS
+
+
+def format_rows(table, fmt='%.7f'):
+    """Format the rows of a 2D array into lines of text at once, by applying a
+    format string repeated for every value instead of formatting each line in
+    a Python loop.
+
+    Args:
+        table (ndarray): an (N, K) array.
+        fmt (string, optional): Defaults to '%.7f'. The format of a value.
+
+    Returns:
+        string: N lines of K values separated by spaces.
+    """
+
+    if not table.size:
+        return ''
+    line = ' '.join([fmt] * table.shape[1]) + '\n'
+    return line * table.shape[0] % tuple(table.ravel().tolist())
+
+
+def export_train(records, save_dir, progress=None, chunk_size=10000):
+    """Save the records in both train4D and train6D text formats in one pass.
+
+    Args:
+        records (ndarray): the records of `TRAJECTORY_DTYPE`.
+        save_dir (string): the saving directory.
+        progress (callable, optional): Defaults to None. Called with the # of
+            exported records and the # of all records after each chunk.
+        chunk_size (int, optional): Defaults to 10000. The # of records
+            formatted at once.
+
+    Returns:
+        list: the paths of saved files.
+    """
+
+    file4d_filepath = os.path.join(save_dir, 'train4D.txt')
+    file6d_filepath = os.path.join(save_dir, 'train6D.txt')
+    with open(file4d_filepath, 'w') as file4d, \
+            open(file6d_filepath, 'w') as file6d:
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            table = np.column_stack([chunk[c] for c in TRAIN6D_COLUMNS])
+            file4d.write(format_rows(table[:, 2:]))
+            file6d.write(format_rows(table))
+            if progress is not None:
+                progress(start + len(chunk), len(records))
+    return [file4d_filepath, file6d_filepath]
+
+
+def export_npy(records, save_dir, progress=None):
+    """Save the records as a structured array in `trajectory.npy`."""
+    filepath = os.path.join(save_dir, 'trajectory.npy')
+    np.save(filepath, records)
+    if progress is not None:
+        progress(len(records), len(records))
+    return [filepath]
+
+
+def export_npz(records, save_dir, progress=None, compressed=False):
+    """Save every column of the records as an array in `trajectory.npz`, or in
+    `trajectory_compressed.npz` compressed if `compressed` is True."""
+    filepath = os.path.join(save_dir, 'trajectory_compressed.npz'
+                            if compressed else 'trajectory.npz')
+    save = np.savez_compressed if compressed else np.savez
+    save(filepath, **{name: records[name] for name in records.dtype.names})
+    if progress is not None:
+        progress(len(records), len(records))
+    return [filepath]
+
+
+def export_npz_compressed(records, save_dir, progress=None):
+    return export_npz(records, save_dir, progress, compressed=True)
+
+
+EXPORTERS = {
+    'train': export_train,
+    'npy': export_npy,
+    'npz': export_npz,
+    'npz_compressed': export_npz_compressed,
+}
@@ -0,0 +1,224 @@
+"""Define the `CarFleet` class simulating many cars in lockstep."""
+
+import numpy as np
+
+from .car import substep_count
+from .raycast import as_wall_array, chunk_slices, ray_dists
+from .spatial import point_segment_dists, segment_dists
+
+# the status of cars in a fleet
+RUNNING, ARRIVED, COLLIDED, NO_READING, STEP_LIMIT = range(5)
+STATUS_NAMES = ('running', 'arrived', 'collided', 'no reading', 'step limit')
+
+# the directions of radars relative to the angle of car: front, left, right
+RADAR_ANGLES = (0, 45, -45)
+
+
+class CarFleet(object):
+    def __init__(self, poses, radius, wall_points, distance_field=None,
+                 radar_table=None):
+        """The N cars moving on the same map, whose states are kept in arrays
+        and updated at once. Every car follows the same rules with `Car`.
+
+        Args:
+            poses (array_like): an (N, 3) array of the start (x, y, angle) of
+                cars, where the angles are in degree.
+            radius (float): the size (radius) of the cars.
+            wall_points (list or ndarray): a list with all the edge points of
+                the map, or the (N, 4) array of wall segments.
+            distance_field (DistanceField, optional): Defaults to None. If
+                given, the collision check is looked up from it.
+            radar_table (RadarTable, optional): Defaults to None. If given, the
+                radars are interpolated from it wherever it can answer, and
+                cast exactly elsewhere.
+        """
+
+        poses = np.asarray(poses, dtype=float).reshape(-1, 3)
+        self.x, self.y = poses[:, 0].copy(), poses[:, 1].copy()
+        self.angle = poses[:, 2] % 360
+        self.wheel_angle = np.zeros(len(poses))
+        self.swept_collision = np.zeros(len(poses), dtype=bool)
+        self.status = np.full(len(poses), RUNNING)
+        self.steps = np.zeros(len(poses), dtype=int)
+        self.radius = radius
+        self.wall_array = as_wall_array(wall_points)
+        self.distance_field = distance_field
+        self.radar_table = radar_table
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def active(self):
+        """The mask of the cars still running."""
+        return self.status == RUNNING
+
+    def move(self, wheel_angles, idx=None, step=1, max_substep=1):
+        """Make the cars move to their next positions like `Car.move`. The
+        circle of every car swept along each sub-step is checked against the
+        walls, and a car stops at the end of the first sub-step touching a
+        wall.
+
+        Args:
+            wheel_angles (array_like): the wheel angles of the cars, which
+                should be in [-40, 40].
+            idx (ndarray, optional): Defaults to None. The indices of the cars
+                to move, otherwise all the cars move.
+            step (float, optional): Defaults to 1. The length of movement.
+            max_substep (float, optional): Defaults to 1. The longest length of
+                a sub-step.
+        """
+
+        if idx is None:
+            idx = np.arange(len(self))
+        self.wheel_angle[idx] = np.clip(wheel_angles, -40, 40)
+        substeps = substep_count(step, max_substep, self.wheel_angle[idx],
+                                 self.radius)
+        lengths = step / substeps
+        moving = np.ones(len(idx), dtype=bool)
+
+        for substep in range(substeps.max()):
+            moving &= substeps > substep
+            cars, length = idx[moving], lengths[moving]
+            if not len(cars):
+                break
+            wheel_angle = np.radians(self.wheel_angle[cars])
+            car_angle = np.radians(self.angle[cars])
+            start_x, start_y = self.x[cars], self.y[cars]
+            self.x[cars] = start_x + length * (
+                np.cos(car_angle + wheel_angle)
+                + np.sin(wheel_angle) * np.sin(car_angle))
+            self.y[cars] = start_y + length * (
+                np.sin(car_angle + wheel_angle)
+                - np.sin(wheel_angle) * np.cos(car_angle))
+            # clipped against the rounding error of the longest sub-step
+            self.angle[cars] = (self.angle[cars] - np.degrees(np.arcsin(
+                np.clip(length * np.sin(wheel_angle) / self.radius, -1, 1)
+            ))) % 360
+
+            swept = np.empty(len(cars), dtype=bool)
+            for chunk in chunk_slices(len(cars), len(self.wall_array)):
+                ends = cars[chunk]
+                swept[chunk] = np.any(segment_dists(
+                    self.wall_array,
+                    (start_x[chunk, np.newaxis], start_y[chunk, np.newaxis]),
+                    (self.x[ends, np.newaxis], self.y[ends, np.newaxis]))
+                    <= self.radius, axis=1)
+            self.swept_collision[cars] |= swept
+            moving[np.flatnonzero(moving)[swept]] = False
+
+    def radars(self, idx=None):
+        """Get the front, left and right radar distances of cars at once.
+
+        Args:
+            idx (ndarray, optional): Defaults to None. The indices of the cars
+                to measure, otherwise all the cars are measured.
+
+        Returns:
+            ndarray: an (M, 3) array of the front, left and right distances,
+            which are NaN for the radars hitting no wall.
+        """
+
+        if idx is None:
+            idx = np.arange(len(self))
+        angles = self.angle[idx, np.newaxis] + RADAR_ANGLES
+        dists = np.full(angles.shape, np.nan)
+        todo = np.ones(angles.shape, dtype=bool)
+        if self.radar_table is not None:
+            poses = np.column_stack((np.repeat(self.x[idx], 3),
+                                     np.repeat(self.y[idx], 3),
+                                     angles.ravel()))
+            looked_up, answered = self.radar_table.lookup(poses)
+            dists.ravel()[answered] = looked_up[answered]
+            todo = ~answered.reshape(angles.shape)
+
+        radians = np.radians(angles)
+        for chunk in chunk_slices(len(idx), 3 * len(self.wall_array)):
+            cars = idx[chunk]
+            cast = np.min(ray_dists(
+                self.wall_array,
+                (self.x[cars, np.newaxis, np.newaxis],
+                 self.y[cars, np.newaxis, np.newaxis]),
+                np.cos(radians[chunk])[..., np.newaxis],
+                np.sin(radians[chunk])[..., np.newaxis]), axis=2)
+            cast[np.isinf(cast)] = np.nan
+            dists[chunk] = np.where(todo[chunk], cast, dists[chunk])
+        return dists
+
+    def collided(self, idx=None):
+        """Check the cars if they are collided against any walls or not,
+        including the walls touched along the path of the last movement.
+
+        Args:
+            idx (ndarray, optional): Defaults to None. The indices of the cars
+                to check, otherwise all the cars are checked.
+
+        Returns:
+            ndarray: the booleans of the cars.
+        """
+
+        if idx is None:
+            idx = np.arange(len(self))
+        if self.distance_field is not None:
+            return self.swept_collision[idx] | (self.distance_field.distances(
+                np.column_stack((self.x[idx], self.y[idx]))) <= self.radius)
+
+        result = self.swept_collision[idx].copy()
+        for chunk in chunk_slices(len(idx), len(self.wall_array)):
+            cars = idx[chunk]
+            result[chunk] |= np.any(point_segment_dists(
+                self.wall_array,
+                (self.x[cars, np.newaxis], self.y[cars, np.newaxis]))
+                <= self.radius, axis=1)
+        return result
+
+    def run(self, fuzzy_system, ending_area, max_steps=1000, step_length=1,
+            max_substep=1):
+        """Drive all the running cars by the fuzzy system until every car
+        arrives at the ending area, collides, loses a radar reading or reaches
+        the step limit. Each step follows the same order with `Simulation`.
+
+        Args:
+            fuzzy_system (FuzzySystem or ControlSurface): the controller taking
+                the front distance and the left minus right distance.
+            ending_area (tuple): (left top, right bottom) corners of the ending
+                area.
+            max_steps (int, optional): Defaults to 1000. The step limit of each
+                car.
+            step_length (float, optional): Defaults to 1. The length of
+                movement of each step.
+            max_substep (float, optional): Defaults to 1. The longest length of
+                a sub-step checked for collision.
+
+        Returns:
+            ndarray: the status of cars.
+        """
+
+        ending_lt, ending_rb = ending_area
+        while True:
+            idx = np.flatnonzero(self.active)
+            if not len(idx):
+                break
+            dists = self.radars(idx)
+            x, y = self.x[idx], self.y[idx]
+            arrived = ((ending_lt[0] <= x) & (x <= ending_rb[0])
+                       & (ending_lt[1] >= y) & (y >= ending_rb[1]))
+            collided = ~arrived & self.collided(idx)
+            no_reading = ~arrived & ~collided & np.any(np.isnan(dists),
+                                                      axis=1)
+            limited = ~arrived & ~collided & ~no_reading \
+                & (self.steps[idx] >= max_steps)
+            self.status[idx[arrived]] = ARRIVED
+            self.status[idx[collided]] = COLLIDED
+            self.status[idx[no_reading]] = NO_READING
+            self.status[idx[limited]] = STEP_LIMIT
+
+            running = ~(arrived | collided | no_reading | limited)
+            idx, dists = idx[running], dists[running]
+            if not len(idx):
+                break
+            wheel_angles = fuzzy_system.singleton_result_batch(
+                np.column_stack((dists[:, 0], dists[:, 1] - dists[:, 2])))
+            self.move(wheel_angles, idx, step_length, max_substep)
+            self.steps[idx] += 1
+        return self.status
@@ -1,58 +1,59 @@
-import math
-import operator
+import collections
+import functools
 
 import numpy as np
 
+from .membership import GaussianMF
+
 
 class FuzzySystem(object):
     def __init__(self, consequence, *antecedents):
         self.consequence = consequence
         self.antecedents = antecedents
-        self.rules = dict()
+        # the consequence fuzzy set index of the rule for each combination of
+        # antecedent fuzzy set indices, or -1 if there is no rule
+        self.rule_tensor = np.full(
+            tuple(len(var.fuzzy_sets) for var in antecedents), -1, dtype=int)
+        self.plan = None
+        self.prune_epsilon = self.truncation = None
+        # the # of rules whose firing strengths are not pruned in the last
+        # inference, which is an ndarray for the batch inference
+        self.active_rules = None
+        self.cache_hits = self.cache_misses = 0
+        self.__cache = None
+        self.__cache_maxsize = self.__cache_tolerance = None
 
     def set_operation_types(self,
                             implication='imp_m',
                             combination_vars='tn_min',
                             combination_rules='tc_max',
-                            defuzzifier='gravity_center'):
-
-        if implication == 'imp_dr':
-            self.implication = dienes_rescher_imp
-        elif implication == 'imp_l':
-            self.implication = lukasieweicz_imp
-        elif implication == 'imp_z':
-            self.implication = zadel_imp
-        elif implication == 'imp_g':
-            self.implication = godel_imp
-        elif implication == 'imp_m':
-            self.implication = mandani_imp
-        else:  # imp_p
-            self.implication = product_imp
-
-        if combination_vars == 'tn_min':
-            self.combination_var = min
-        elif combination_vars == 'tn_ap':
-            self.combination_var = operator.mul
-        elif combination_vars == 'tn_bp':
-            self.combination_var = bounded_product
-        else:  # 'tn_dp'
-            self.combination_var = drastic_product
-
-        if combination_rules == 'tc_max':
-            self.combination_rule = max
-        elif combination_rules == 'tc_as':
-            self.combination_rule = algebraic_sum
-        elif combination_rules == 'tc_bs':
-            self.combination_rule = bounded_sum
-        else:  # tc_ds
-            self.combination_rule = drastic_sum
-
-        if defuzzifier == 'gravity_center':
-            self.defuzzifier = gravity_center_defuzzifier
-        elif defuzzifier == 'maxima_mean':
-            self.defuzzifier = maxima_mean_defuzzifier
-        elif defuzzifier == 'modified_maxima_mean':
-            self.defuzzifier = modified_maxima_mean_defuzzifier
+                            defuzzifier='gravity_center',
+                            inference='mamdani'):
+        """Set the operation types of the fuzzy system by the names registered
+        in `IMPLICATIONS`, `T_NORMS`, `S_NORMS` and `DEFUZZIFIERS`.
+
+        Args:
+            implication (string, optional): Defaults to 'imp_m'.
+            combination_vars (string, optional): Defaults to 'tn_min'.
+            combination_rules (string, optional): Defaults to 'tc_max'.
+            defuzzifier (string, optional): Defaults to 'gravity_center'.
+            inference (string, optional): Defaults to 'mamdani'. Can take
+                'mamdani' or 'tsk'. For 'tsk' (Takagi-Sugeno-Kang), the
+                consequence must be a `TSKConsequence`, and the output is the
+                average of the rule outputs weighted by their firing strengths,
+                so `implication`, `combination_rules` and `defuzzifier` are
+                ignored.
+
+        Raises:
+            KeyError: When a name is not registered.
+        """
+
+        self.plan = None
+        self.inference = inference
+        self.implication = lookup_operation(IMPLICATIONS, implication)
+        self.combination_var = lookup_operation(T_NORMS, combination_vars)
+        self.combination_rule = lookup_operation(S_NORMS, combination_rules)
+        self.defuzzifier = lookup_operation(DEFUZZIFIERS, defuzzifier)
 
     def add_rule(self, consequence_fuzzy_set_name, antecedent_fuzzy_set_names):
         """Add a fuzzy rule.
@@ -81,75 +82,335 @@ class FuzzySystem(object):
             if name not in var.fuzzy_sets.keys():
                 raise KeyError("Cannot find '%s' in '%s'" %
                                (name, var.fuzzy_sets.keys()))
-        self.rules[antecedent_fuzzy_set_names] = consequence_fuzzy_set_name
+        self.__fit_rule_tensor()
+        cell = tuple(list(var.fuzzy_sets).index(name) for name, var
+                     in zip(antecedent_fuzzy_set_names, self.antecedents))
+        self.rule_tensor[cell] = list(self.consequence.fuzzy_sets).index(
+            consequence_fuzzy_set_name)
+        self.plan = None
+
+    def set_rule_tensor(self, rule_tensor):
+        """Set all the fuzzy rules at once by the fuzzy set indices, where the
+        indices follow the insertion order of the fuzzy sets in each variable.
+
+        Args:
+            rule_tensor (array_like): an integer array whose shape is the # of
+                fuzzy sets of each antecedent. Each element is the index of
+                consequence fuzzy set for the combination of antecedent fuzzy
+                sets at its position, or -1 if there is no rule for it.
+
+        Raises:
+            IndexError: When the shape does not match the # of fuzzy sets of
+                antecedents, or an index is out of the consequence fuzzy sets.
+        """
+
+        rule_tensor = np.array(rule_tensor, dtype=int)
+        shape = tuple(len(var.fuzzy_sets) for var in self.antecedents)
+        if rule_tensor.shape != shape:
+            raise IndexError("The shape of rule tensor must be the # of fuzzy "
+                             "sets of antecedents: %s" % (shape,))
+        if np.any((rule_tensor < -1)
+                  | (rule_tensor >= len(self.consequence.fuzzy_sets))):
+            raise IndexError("The consequence fuzzy set index must be in "
+                             "[-1, %d)" % len(self.consequence.fuzzy_sets))
+        self.rule_tensor = rule_tensor
+        self.plan = None
+
+    @property
+    def rules(self):
+        """dict: the fuzzy rules in the form of {antecedent fuzzy set names:
+        consequence fuzzy set name}."""
+
+        self.__fit_rule_tensor()
+        names = [tuple(var.fuzzy_sets) for var in self.antecedents]
+        consequence_names = tuple(self.consequence.fuzzy_sets)
+        return {tuple(n[idx] for n, idx in zip(names, cell)):
+                consequence_names[consequence]
+                for cell, consequence in np.ndenumerate(self.rule_tensor)
+                if consequence >= 0}
+
+    def __fit_rule_tensor(self):
+        """Extend the rule tensor without rules if any fuzzy set has been added
+        to the antecedents after the fuzzy system is created."""
+
+        shape = tuple(len(var.fuzzy_sets) for var in self.antecedents)
+        if self.rule_tensor.shape != shape:
+            self.rule_tensor = np.pad(
+                self.rule_tensor,
+                [(0, n - m) for n, m in zip(shape, self.rule_tensor.shape)],
+                mode='constant', constant_values=-1)
+
+    def set_pruning(self, epsilon=1e-3, truncation=None):
+        """Skip the rules whose firing strengths are less than `epsilon` while
+        inferring. It only takes effect for TSK inference and the implications
+        that are 0 when the firing strength is 0 (Mamdani and Product), since
+        an inactive rule still contributes to the others.
+
+        Args:
+            epsilon (float, optional): Defaults to 1e-3. The minimum firing
+                strength of an active rule. Use None to disable pruning.
+            truncation (float, optional): Defaults to None. If not None, the
+                Gaussian membership functions of antecedents are truncated
+                outside `truncation` sigmas, so their degrees are exactly 0
+                there.
+        """
+
+        self.prune_epsilon, self.truncation = epsilon, truncation
+        self.plan = None
+
+    def compile(self):
+        """Freeze the rules, the operation types and the consequence fuzzy sets
+        into an `InferencePlan`. The plan is compiled automatically by
+        `singleton_result` if `add_rule` or `set_operation_types` has been
+        called after the last compilation. The results cache is cleared since
+        it may be out of date.
+
+        Returns:
+            InferencePlan: the compiled plan which is also kept in `self.plan`.
+
+        Raises:
+            ValueError: When there is no rule in the fuzzy system.
+            TypeError: When the consequence is not a `TSKConsequence` for TSK
+                inference.
+            IndexError: When a TSK output has more coefficients than 1 + the #
+                of `self.antecedents`.
+        """
+
+        self.__fit_rule_tensor()
+        rule_cells = np.flatnonzero(self.rule_tensor >= 0)
+        if not len(rule_cells):
+            raise ValueError("Cannot compile a fuzzy system without any rule.")
+        if (self.inference == 'tsk'
+                and not isinstance(self.consequence, TSKConsequence)):
+            raise TypeError("The consequence should be a instance of "
+                            "TSKConsequence for TSK inference.")
+
+        support = get_support()
+        membershipfs = tuple(tuple(var.fuzzy_sets.values())
+                             for var in self.antecedents)
+        if self.truncation is not None:
+            membershipfs = tuple(
+                tuple(GaussianMF(f.mean, f.sig, f.ascending, f.descending,
+                                 self.truncation)
+                      if isinstance(f, GaussianMF) else f for f in fs)
+                for fs in membershipfs)
+        prune_epsilon = self.prune_epsilon
+        if (self.inference != 'tsk'
+                and self.implication not in (mandani_imp, product_imp)):
+            prune_epsilon = None
+        consequences = self.rule_tensor.ravel()[rule_cells]
+        consequence_names = tuple(self.consequence.fuzzy_sets)
+        consequence_samples = dict()
+        for idx in np.unique(consequences):
+            name = consequence_names[idx]
+            if self.inference == 'tsk':
+                coefs = self.consequence.fuzzy_sets[name]
+                if len(coefs) > len(self.antecedents) + 1:
+                    raise IndexError("The # of coefficients of '%s' must not "
+                                     "be more than %d" %
+                                     (name, len(self.antecedents) + 1))
+                consequence_samples[idx] = coefs + (0,) * (
+                    len(self.antecedents) + 1 - len(coefs))
+            else:
+                membershipf = self.consequence.fuzzy_sets[name]
+                consequence_samples[idx] = [membershipf(c) for c in support]
+        consequence_table = np.array(
+            [consequence_samples[idx] for idx in consequences], dtype=float)
+        consequence_table.flags.writeable = False
+        rule_cells.flags.writeable = False
+
+        if self.__cache is not None:
+            self.__cache.clear()
+        self.plan = InferencePlan(membershipfs, rule_cells,
+                                  consequence_table, self.implication,
+                                  self.combination_var, self.combination_rule,
+                                  self.defuzzifier, support, self.inference,
+                                  prune_epsilon)
+        return self.plan
 
     def singleton_result(self, *inputs):
-        def combi_var_outs(outs):
-            """Calculate the combined-vars result from each variable's
-            membership_function(crisp_input) by
-            `self.combination_var`.
+        if len(inputs) != len(self.antecedents):
+            raise IndexError("The # of inputs must be the same with "
+                             "'self.antecedents': %d" % len(self.antecedents))
 
-            Args:
-                outs (list(float)): a list contains each variable's
-                    membership_function(crisp_input).
+        plan = self.plan if self.plan is not None else self.compile()
+        if self.__cache is None:
+            return float(self.__infer(plan, inputs))
+
+        key = tuple(round(crisp / self.__cache_tolerance) for crisp in inputs)
+        try:
+            result = self.__cache[key]
+        except KeyError:
+            self.cache_misses += 1
+            result = float(self.__infer(
+                plan, [k * self.__cache_tolerance for k in key]))
+            self.__cache[key] = result
+            if len(self.__cache) > self.__cache_maxsize:
+                self.__cache.popitem(last=False)
+        else:
+            self.cache_hits += 1
+            self.__cache.move_to_end(key)
+            # no rule is inferred for the cached result
+            self.active_rules = None
+        return result
+
+    def enable_cache(self, maxsize=4096, tolerance=1e-3):
+        """Memoize the results of `singleton_result` in a LRU cache. The crisp
+        inputs are quantized to the multiples of `tolerance`, and the result is
+        inferred from the quantized inputs, so the inputs in the same quantum
+        share one result. The cache is cleared whenever the system compiles,
+        and `self.active_rules` is None after a cache hit.
 
-            Returns:
-                float: the result of combining every variable's crisp output.
-            """
+        Args:
+            maxsize (int, optional): Defaults to 4096. The maximum # of results
+                kept in the cache.
+            tolerance (float, optional): Defaults to 1e-3. The quantization
+                step of the crisp inputs.
 
-            if len(outs) == 2:
-                return self.combination_var(outs[0], outs[1])
-            return self.combination_var(outs[0], combi_var_outs(outs[1:]))
+        Raises:
+            ValueError: When `maxsize` or `tolerance` is not positive.
+        """
 
-        def combi_rule_outs(outs):
-            """Basically, this is the same as `combi_var_outs`, except that this
-            is for combining each rule's crisp output.
+        if maxsize <= 0 or tolerance <= 0:
+            raise ValueError("'maxsize' and 'tolerance' must be positive.")
+        self.__cache = collections.OrderedDict()
+        self.__cache_maxsize, self.__cache_tolerance = maxsize, tolerance
+        self.cache_hits = self.cache_misses = 0
 
-            Args:
-                outs (list(float)): a list contains each rule's
-                    rule_membership_function(crisp_input).
+    def disable_cache(self):
+        self.__cache = None
+        self.__cache_maxsize = self.__cache_tolerance = None
 
-            Returns:
-                float: the result of combining every rule's crisp output.
-            """
+    def cache_info(self):
+        """Get the statistics of the results cache.
 
-            if len(outs) == 2:
-                return self.combination_rule(outs[0], outs[1])
-            return self.combination_rule(outs[0], combi_rule_outs(outs[1:]))
+        Returns:
+            CacheInfo: (hits, misses, maxsize, currsize) of the cache, where
+            `maxsize` and `currsize` are None if the cache is disabled.
+        """
 
-        def system_membershipf(crisp_input):
-            """Calculate the crisp output according to ALL rules and ALL
-            antecedents.
+        return CacheInfo(self.cache_hits, self.cache_misses,
+                         self.__cache_maxsize,
+                         None if self.__cache is None else len(self.__cache))
 
-            Args:
-                crisp_input (float): the crisp input to the WHOLE fuzzy system.
+    def singleton_result_batch(self, inputs, chunk_size=256):
+        """Get the crisp outputs of many input vectors at once. Every stage of
+        inference is done by broadcasting array operations, so the membership
+        functions of antecedents must accept ndarrays.
 
-            Returns:
-                float: the crisp output of the WHOLE fuzzy system.
-            """
+        Args:
+            inputs (array_like): the crisp inputs with the shape of (N, # of
+                `self.antecedents`).
+            chunk_size (int, optional): Defaults to 256. The # of input vectors
+                inferred together, which bounds the memory used by the
+                (rules, chunk_size, support) intermediate arrays.
 
-            return combi_rule_outs([f(crisp_input) for f in self.__rule_membershipfs])
+        Returns:
+            ndarray: the N crisp outputs.
 
-        if len(inputs) != len(self.antecedents):
-            raise IndexError("The # of inputs must be the same with "
+        Raises:
+            IndexError: When the # of columns of `inputs` is not equal to the #
+                of `self.antecedents`.
+        """
+
+        inputs = np.asarray(inputs, dtype=float)
+        if inputs.ndim != 2 or inputs.shape[1] != len(self.antecedents):
+            raise IndexError("The # of input columns must be the same with "
                              "'self.antecedents': %d" % len(self.antecedents))
 
-        self.__rule_membershipfs = []
-        # create the membership functions for each rule
-        for antecedent_names, consequence_name in self.rules.items():
-            antecedent_outs = []
-            # get the results from each membership function of antecedent with
-            # crisp inputs
-            for crisp, var, name in zip(inputs, self.antecedents, antecedent_names):
-                # save the results from each membership function of antecedent
-                antecedent_outs.append(var.fuzzy_sets[name](crisp))
-            # store the membership functions for each rule
-            self.__rule_membershipfs.append(
-                self.implication(combi_var_outs(antecedent_outs),
-                                 self.consequence.fuzzy_sets[consequence_name]))
+        plan = self.plan if self.plan is not None else self.compile()
+        results = np.empty(len(inputs))
+        active_rules = np.empty(len(inputs), dtype=int)
+        for start in range(0, len(inputs), chunk_size):
+            chunk = inputs[start:start + chunk_size]
+            results[start:start + chunk_size] = self.__infer(plan, chunk.T)
+            active_rules[start:start + chunk_size] = self.active_rules
+        # the counts of every chunk instead of the last one
+        self.active_rules = active_rules
+        return results
+
+    def __infer(self, plan, inputs):
+        """Infer the crisp outputs by a compiled plan, and count the active
+        rules in `self.active_rules`.
+
+        Args:
+            plan (InferencePlan): the compiled fuzzy system.
+            inputs (sequence): the crisp inputs for each antecedent, which are
+                either all floats or all ndarrays in the same shape.
+
+        Returns:
+            float or ndarray: the crisp outputs in the shape of each input.
+        """
 
-        # Defuzzify
-        return self.defuzzifier(system_membershipf)
+        batch_shape = np.shape(inputs[0])
+        # get the results from each membership function of antecedent with
+        # crisp inputs, and put the fuzzy sets of the i-th antecedent on the
+        # i-th axis
+        antecedent_outs = []
+        for axis, (crisp, membershipfs) in enumerate(zip(inputs,
+                                                         plan.membershipfs)):
+            shape = [1] * len(plan.membershipfs)
+            shape[axis] = len(membershipfs)
+            antecedent_outs.append(
+                np.array([f(crisp) for f in membershipfs], dtype=float)
+                .reshape(tuple(shape) + batch_shape))
+        # the firing strengths of every combination of antecedent fuzzy sets
+        # by the outer combination, and then keep the ones having rules
+        strengths = plan.combination_var.reduce(
+            np.stack(np.broadcast_arrays(*antecedent_outs)), axis=0).reshape(
+                (-1,) + batch_shape)[plan.rule_cells]
+        consequence_table = plan.consequence_table
+        if plan.prune_epsilon is None:
+            self.active_rules = np.sum(strengths > 0, axis=0)
+        else:
+            # zero the inactive strengths, which is the same as skipping them,
+            # and drop the rules inactive for every input
+            active = strengths >= plan.prune_epsilon
+            self.active_rules = np.sum(active, axis=0)
+            strengths = np.where(active, strengths, 0)
+            active_rules = np.flatnonzero(
+                active.reshape(len(active), -1).any(axis=1))
+            if len(active_rules):
+                strengths = strengths[active_rules]
+                consequence_table = consequence_table[active_rules]
+        consequence_table = consequence_table.reshape(
+            (len(strengths),) + (1,) * (strengths.ndim - 1) + (-1,))
+
+        if plan.inference == 'tsk':
+            # the weighted average of the (linear) outputs of each rule
+            rule_outs = consequence_table[..., 0] + sum(
+                consequence_table[..., idx + 1] * crisp
+                for idx, crisp in enumerate(inputs))
+            total_strength = np.sum(strengths, axis=0)
+            weighted_sum = np.sum(strengths * rule_outs, axis=0)
+            return np.divide(weighted_sum, total_strength,
+                             out=np.zeros(np.shape(total_strength)),
+                             where=total_strength != 0)
+
+        # sample the implication result of each rule on the support grid
+        rule_outs = plan.implication(strengths[..., np.newaxis],
+                                     consequence_table)
+
+        # Aggregate all rules and defuzzify
+        return plan.defuzzifier(plan.support,
+                                plan.combination_rule.reduce(rule_outs, axis=0))
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+InferencePlan = collections.namedtuple('InferencePlan', [
+    'membershipfs',  # membership functions of each antecedent variable
+    'rule_cells',  # the flat index of every rule in the rule tensor
+    'consequence_table',  # consequence of every rule sampled on the support
+    'implication',
+    'combination_var',
+    'combination_rule',
+    'defuzzifier',
+    'support',
+    'inference',
+    'prune_epsilon'  # None if pruning is disabled or not applicable
+])
 
 
 class FuzzyVariable(object):
@@ -160,109 +421,200 @@ class FuzzyVariable(object):
         self.fuzzy_sets[fuzzy_set_name] = membershipf
 
 
+class TSKConsequence(object):
+    def __init__(self):
+        """The consequence of TSK inference, whose fuzzy sets are the crisp
+        outputs in the form of `c0 + c1 * x1 + ... + cn * xn` where `xi` is the
+        crisp input of the i-th antecedent."""
+
+        self.fuzzy_sets = dict()
+
+    def add_output(self, fuzzy_set_name, *coefs):
+        """Add a (linear) output.
+
+        Args:
+            fuzzy_set_name (string): the name used by the rules.
+            *coefs (float): the constant term followed by the coefficients of
+                each antecedent. The missing coefficients are zeros, so a
+                single value makes a constant (zero-order) output.
+
+        Raises:
+            IndexError: When no coefficient is given.
+        """
+
+        if not coefs:
+            raise IndexError("At least the constant term should be given.")
+        self.fuzzy_sets[fuzzy_set_name] = tuple(map(float, coefs))
+
+
+class Norm(object):
+    __slots__ = ('binary', 'reduce')
+
+    def __init__(self, binary, reduce):
+        """A t-norm or s-norm.
+
+        Args:
+            binary (function): f(a, b), combining two values or ndarrays
+                element-wisely.
+            reduce (function): f(values, axis), combining any # of values
+                along an axis of ndarray.
+        """
+
+        self.binary, self.reduce = binary, reduce
+
+    def __call__(self, a, b):
+        return self.binary(a, b)
+
+
+def lookup_operation(registry, name):
+    try:
+        return registry[name]
+    except KeyError:
+        raise KeyError("Cannot find '%s' in '%s'" % (name, registry.keys()))
+
+
 def bounded_product(a, b):
-    return max(0, a + b - 1)
+    return np.maximum(0, a + b - 1)
+
+
+def bounded_product_reduce(values, axis):
+    return np.maximum(0, np.sum(values, axis=axis) - (values.shape[axis] - 1))
 
 
 def drastic_product(a, b):
-    if b == 1:
-        return a
-    if a == 1:
-        return b
-    return 0
+    return np.where(b == 1, a, np.where(a == 1, b, 0))
+
+
+def drastic_product_reduce(values, axis):
+    # non-zero only if at most one value is not 1
+    return np.where(np.sum(values != 1, axis=axis) <= 1,
+                    np.min(values, axis=axis), 0)
 
 
 def algebraic_sum(a, b):
     return a + b - a * b
 
 
+def algebraic_sum_reduce(values, axis):
+    return 1 - np.prod(1 - values, axis=axis)
+
+
 def bounded_sum(a, b):
-    return min(1, a + b)
+    return np.minimum(1, a + b)
+
+
+def bounded_sum_reduce(values, axis):
+    return np.minimum(1, np.sum(values, axis=axis))
 
 
 def drastic_sum(a, b):
-    if b == 0:
-        return a
-    if a == 0:
-        return b
-    return 1
+    return np.where(b == 0, a, np.where(a == 0, b, 1))
 
 
-def dienes_rescher_imp(antecedent_out, consequence_membershipf):
-    def imp(consequence_crisp):
-        return max(1 - antecedent_out, consequence_membershipf(consequence_crisp))
-    return imp
+def drastic_sum_reduce(values, axis):
+    # not 1 only if at most one value is not 0
+    return np.where(np.sum(values != 0, axis=axis) <= 1,
+                    np.max(values, axis=axis), 1)
 
 
-def lukasieweicz_imp(antecedent_out, consequence_membershipf):
-    def imp(consequence_crisp):
-        return min(1, 1 - antecedent_out + consequence_membershipf(consequence_crisp))
-    return imp
+def dienes_rescher_imp(antecedent_out, consequence_outs):
+    return np.maximum(1 - antecedent_out, consequence_outs)
 
 
-def zadel_imp(antecedent_out, consequence_membershipf):
-    def imp(consequence_crisp):
-        return max(min(antecedent_out,
-                       consequence_membershipf(consequence_crisp)),
-                   1 - antecedent_out)
-    return imp
+def lukasieweicz_imp(antecedent_out, consequence_outs):
+    return np.minimum(1, 1 - antecedent_out + consequence_outs)
 
 
-def godel_imp(antecedent_out, consequence_membershipf):
-    def imp(consequence_crisp):
-        if antecedent_out <= consequence_membershipf(consequence_crisp):
-            return 1
-        return consequence_membershipf(consequence_crisp) / antecedent_out
-    return imp
+def zadel_imp(antecedent_out, consequence_outs):
+    return np.maximum(np.minimum(antecedent_out, consequence_outs),
+                      1 - antecedent_out)
 
 
-def mandani_imp(antecedent_out, consequence_membershipf):
-    def imp(consequence_crisp):
-        return min(antecedent_out, consequence_membershipf(consequence_crisp))
-    return imp
+def godel_imp(antecedent_out, consequence_outs):
+    antecedent_out = np.asarray(antecedent_out, dtype=float)
+    return np.divide(consequence_outs, antecedent_out,
+                     out=np.ones(np.broadcast(antecedent_out,
+                                              consequence_outs).shape),
+                     where=antecedent_out > consequence_outs)
 
 
-def product_imp(antecedent_out, consequence_membershipf):
-    def imp(consequence_crisp):
-        return operator.mul(antecedent_out, consequence_membershipf(consequence_crisp))
-    return imp
+def mandani_imp(antecedent_out, consequence_outs):
+    return np.minimum(antecedent_out, consequence_outs)
 
 
-def gravity_center_defuzzifier(system_membershipf, support_min=-40, support_max=40):
-    support_range = support_max - support_min
-    result_fuzzy_area = result_fuzzy_weighted_area = 0
-    for crisp in np.linspace(support_min, support_max, support_range * 10, True):
-        system_crisp_out = system_membershipf(crisp)
-        result_fuzzy_area += system_crisp_out
-        result_fuzzy_weighted_area += system_crisp_out * crisp
-    if result_fuzzy_area == 0:
-        return 0
-    return result_fuzzy_weighted_area / result_fuzzy_area
+def product_imp(antecedent_out, consequence_outs):
+    return np.multiply(antecedent_out, consequence_outs)
 
 
-def maxima_mean_defuzzifier(system_membershipf, support_min=-40, support_max=40):
-    support_range = support_max - support_min
-    support_space = np.linspace(support_min, support_max, support_range * 10, True)
-    system_crisp_outs = [system_membershipf(c) for c in support_space]
-    max_crisp_out = max(system_crisp_outs)
-    max_crisp = [c for c in support_space if system_membershipf(
-        c) == max_crisp_out]
-    return sum(max_crisp) / len(max_crisp)
+@functools.lru_cache(maxsize=None)
+def get_support(support_min=-40, support_max=40):
+    """Get the discrete support grid of consequence for defuzzification. The
+    grid is cached and marked read-only since it is shared by every system.
 
+    Args:
+        support_min (int, optional): Defaults to -40. The lower bound.
+        support_max (int, optional): Defaults to 40. The upper bound.
+
+    Returns:
+        ndarray: 10 samples per unit from `support_min` to `support_max`.
+    """
 
-def modified_maxima_mean_defuzzifier(system_membershipf, support_min=-40, support_max=40):
     support_range = support_max - support_min
-    support_space = np.linspace(support_min, support_max, support_range * 10, True)
-    system_crisp_outs = [system_membershipf(c) for c in support_space]
-    return (support_space[system_crisp_outs.index(max(system_crisp_outs))]
-            - support_space[system_crisp_outs.index(min(system_crisp_outs))]) / 2
+    support = np.linspace(support_min, support_max, support_range * 10, True)
+    support.flags.writeable = False
+    return support
+
+
+def gravity_center_defuzzifier(support, system_outs):
+    result_fuzzy_area = np.sum(system_outs, axis=-1)
+    result_fuzzy_weighted_area = np.dot(system_outs, support)
+    return np.divide(result_fuzzy_weighted_area, result_fuzzy_area,
+                     out=np.zeros(np.shape(result_fuzzy_area)),
+                     where=result_fuzzy_area != 0)
+
+
+def maxima_mean_defuzzifier(support, system_outs):
+    is_max = system_outs == np.max(system_outs, axis=-1, keepdims=True)
+    return np.dot(is_max, support) / np.sum(is_max, axis=-1)
+
+
+def modified_maxima_mean_defuzzifier(support, system_outs):
+    return (support[np.argmax(system_outs, axis=-1)]
+            - support[np.argmin(system_outs, axis=-1)]) / 2
+
+
+# The registries of operation types. Register a new one by adding it to the
+# corresponding dictionary with a new name.
+IMPLICATIONS = {
+    'imp_dr': dienes_rescher_imp,
+    'imp_l': lukasieweicz_imp,
+    'imp_z': zadel_imp,
+    'imp_g': godel_imp,
+    'imp_m': mandani_imp,
+    'imp_p': product_imp
+}
+
+T_NORMS = {
+    'tn_min': Norm(np.minimum, np.min),
+    'tn_ap': Norm(np.multiply, np.prod),
+    'tn_bp': Norm(bounded_product, bounded_product_reduce),
+    'tn_dp': Norm(drastic_product, drastic_product_reduce)
+}
+
+S_NORMS = {
+    'tc_max': Norm(np.maximum, np.max),
+    'tc_as': Norm(algebraic_sum, algebraic_sum_reduce),
+    'tc_bs': Norm(bounded_sum, bounded_sum_reduce),
+    'tc_ds': Norm(drastic_sum, drastic_sum_reduce)
+}
+
+DEFUZZIFIERS = {
+    'gravity_center': gravity_center_defuzzifier,
+    'maxima_mean': maxima_mean_defuzzifier,
+    'modified_maxima_mean': modified_maxima_mean_defuzzifier
+}
 
 
 def get_gaussianf(mean, sig, ascending, descending):
-    def gaussian(var):
-        if ascending and var > mean:
-            return 1
-        if descending and var < mean:
-            return 1
-        return math.exp(-(var - mean)**2 / sig**2)
-    return gaussian
+    """Kept for compatibility. Use `GaussianMF` instead."""
+    return GaussianMF(mean, sig, ascending, descending)
@@ -0,0 +1,36 @@
+"""Define the interpolation on regular grids shared by the lookup tables."""
+
+import numpy as np
+
+
+def bilinear(values, u, v):
+    """Interpolate a 2D grid bilinearly at fractional grid indices, which are
+    clipped onto the border of the grid.
+
+    Args:
+        values (ndarray): an (NX, NY) array of the values on the grid points,
+            where NX and NY are at least 2.
+        u (float or ndarray): the fractional indices along the first axis.
+        v (float or ndarray): the fractional indices along the second axis,
+            with the same shape as `u`.
+
+    Returns:
+        float or ndarray: the interpolated values, which is a float if `u` and
+        `v` are scalars.
+    """
+
+    nx, ny = values.shape
+    if np.ndim(u) == 0 and np.ndim(v) == 0:
+        # the plain Python arithmetic is faster than numpy for a single point
+        u, v = min(max(u, 0), nx - 1), min(max(v, 0), ny - 1)
+        row, col = min(int(u), nx - 2), min(int(v), ny - 2)
+    else:
+        u, v = np.clip(u, 0, nx - 1), np.clip(v, 0, ny - 1)
+        row = np.minimum(u.astype(int), nx - 2)
+        col = np.minimum(v.astype(int), ny - 2)
+    u, v = u - row, v - col
+    result = ((1 - u) * ((1 - v) * values[row, col]
+                         + v * values[row, col + 1])
+              + u * ((1 - v) * values[row + 1, col]
+                     + v * values[row + 1, col + 1]))
+    return float(result) if np.ndim(result) == 0 else result
@@ -0,0 +1,129 @@
+"""Define the membership functions of fuzzy sets. Every membership function
+accepts either a float or an ndarray of crisp values."""
+
+import numpy as np
+
+
+class GaussianMF(object):
+    __slots__ = ('mean', 'sig', 'ascending', 'descending', 'truncation')
+
+    def __init__(self, mean, sig, ascending=False, descending=False,
+                 truncation=None):
+        """The Gaussian membership function with optional shoulders and compact
+        support.
+
+        Args:
+            mean (float): the mean (center) of the Gaussian function.
+            sig (float): the standard deviation of the Gaussian function.
+            ascending (bool, optional): Defaults to False. If True, the
+                membership degree is 1 for any value larger than the mean.
+            descending (bool, optional): Defaults to False. If True, the
+                membership degree is 1 for any value smaller than the mean.
+            truncation (float, optional): Defaults to None. If not None, the
+                membership degree is 0 for any value farther than
+                `truncation` * `sig` from the mean.
+        """
+
+        self.mean, self.sig = mean, sig
+        self.ascending, self.descending = ascending, descending
+        self.truncation = truncation
+
+    def __call__(self, var):
+        var = np.asarray(var, dtype=float)
+        out = np.exp(-(var - self.mean)**2 / self.sig**2)
+        if self.truncation is not None:
+            out = np.where(np.abs(var - self.mean) > self.truncation * self.sig,
+                           0, out)
+        if self.ascending:
+            out = np.where(var > self.mean, 1, out)
+        if self.descending:
+            out = np.where(var < self.mean, 1, out)
+        return out[()]
+
+    def __repr__(self):
+        return 'GaussianMF(%r, %r, %r, %r, %r)' % (
+            self.mean, self.sig, self.ascending, self.descending,
+            self.truncation)
+
+
+class TrapezoidalMF(object):
+    __slots__ = ('left', 'left_top', 'right_top', 'right')
+
+    def __init__(self, left, left_top, right_top, right):
+        """The trapezoidal membership function. A vertical edge is made when
+        a bottom corner and its top corner are at the same place.
+
+        Args:
+            left (float): the left bottom corner.
+            left_top (float): the left top corner.
+            right_top (float): the right top corner.
+            right (float): the right bottom corner.
+
+        Raises:
+            ValueError: When the corners are not in ascending order.
+        """
+
+        if not left <= left_top <= right_top <= right:
+            raise ValueError("The corners of trapezoid must be in ascending "
+                             "order.")
+        self.left, self.left_top = left, left_top
+        self.right_top, self.right = right_top, right
+
+    def __call__(self, var):
+        var = np.asarray(var, dtype=float)
+        return np.minimum(ramp(var, self.left, self.left_top),
+                          ramp(-var, -self.right, -self.right_top))[()]
+
+    def __repr__(self):
+        return 'TrapezoidalMF(%r, %r, %r, %r)' % (self.left, self.left_top,
+                                                  self.right_top, self.right)
+
+
+class TriangularMF(TrapezoidalMF):
+    __slots__ = ()
+
+    def __init__(self, left, peak, right):
+        """The triangular membership function.
+
+        Args:
+            left (float): the left bottom corner.
+            peak (float): the top corner.
+            right (float): the right bottom corner.
+        """
+
+        super().__init__(left, peak, peak, right)
+
+    def __repr__(self):
+        return 'TriangularMF(%r, %r, %r)' % (self.left, self.left_top,
+                                             self.right)
+
+
+class SigmoidMF(object):
+    __slots__ = ('slope', 'center')
+
+    def __init__(self, slope, center):
+        """The sigmoid membership function, which is ascending if the slope is
+        positive, and descending otherwise.
+
+        Args:
+            slope (float): the slope at the center.
+            center (float): the crisp value whose membership degree is 0.5.
+        """
+
+        self.slope, self.center = slope, center
+
+    def __call__(self, var):
+        var = np.asarray(var, dtype=float)
+        return (1 / (1 + np.exp(-self.slope * (var - self.center))))[()]
+
+    def __repr__(self):
+        return 'SigmoidMF(%r, %r)' % (self.slope, self.center)
+
+
+def ramp(var, start, end):
+    """Return 0 before `start`, 1 after `end` and the linear interpolation
+    between them. It is a step at `end` if `start` equals to `end`."""
+
+    if start == end:
+        return np.where(var >= end, 1., 0.)
+    return np.clip((var - start) / (end - start), 0, 1)
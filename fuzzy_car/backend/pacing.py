@@ -0,0 +1,75 @@
+"""Define the frame pacing against absolute deadlines."""
+
+import time
+
+
+class FramePacer(object):
+    def __init__(self, fps, tolerance=0.5, clock=time.perf_counter,
+                 sleep=time.sleep):
+        """The scheduler of frames at a fixed rate. The deadline of the n-th
+        frame is `n / fps` seconds after `reset`, so the time spent between
+        frames does not delay the following ones. When it falls behind, the
+        deadlines already passed are skipped instead of being caught up.
+
+        Args:
+            fps (float): the target frame rate.
+            tolerance (float, optional): Defaults to 0.5. A frame is late if
+                it is presented after its deadline by more than this fraction
+                of the frame interval.
+            clock (callable, optional): Defaults to `time.perf_counter`. The
+                monotonic clock in seconds.
+            sleep (callable, optional): Defaults to `time.sleep`.
+        """
+
+        self.target_fps = fps
+        self.interval = 1 / fps
+        self.tolerance = tolerance * self.interval
+        self.__clock, self.__sleep = clock, sleep
+        self.reset()
+
+    def reset(self):
+        """Restart the deadlines from now and clear the statistics."""
+        self.start_time = self.__clock()
+        self.deadline = self.start_time + self.interval
+        self.frames = 0
+        self.late_frames = 0
+        self.skipped_frames = 0
+
+    def wait(self):
+        """Sleep until the deadline of the next frame, and present it."""
+        now = self.__clock()
+        if now < self.deadline:
+            self.__sleep(self.deadline - now)
+            now = self.__clock()
+        self.__present(now)
+
+    def due(self):
+        """Present the next frame if its deadline has passed, without
+        sleeping.
+
+        Returns:
+            bool: if a frame is presented.
+        """
+
+        now = self.__clock()
+        if now < self.deadline:
+            return False
+        self.__present(now)
+        return True
+
+    @property
+    def achieved_fps(self):
+        """The # of presented frames per second since `reset`."""
+        elapsed = self.__clock() - self.start_time
+        return self.frames / elapsed if elapsed > 0 else 0.
+
+    def __present(self, now):
+        """Count a frame presented at `now` and move to the next deadline
+        after it."""
+
+        self.frames += 1
+        if now - self.deadline > self.tolerance:
+            self.late_frames += 1
+        missed = max(0, int((now - self.deadline) // self.interval))
+        self.skipped_frames += missed
+        self.deadline += (missed + 1) * self.interval
@@ -5,9 +5,16 @@ import math
 
 import numpy as np
 
+# The tolerance in float computation. Two x-coordinates closer than it make a
+# vertical line, and two lines are parallel if the determinant of their
+# coefficients is smaller than it relative to the magnitude of the products.
+EPSILON = 1e-12
+
 
 class Line2D(object):
-    def __init__(self, arg1, arg2, arg3=None):
+    __slots__ = ('x_coef', 'y_coef', 'const')
+
+    def __init__(self, arg1, arg2, arg3=None, precise=False):
         """Create a 2D-plane line.
 
         Args:
@@ -20,9 +27,15 @@ class Line2D(object):
             arg3 (float, optional): Defaults to None. If not None, arg1, arg2,
                 and arg3 are the x-coefficient, y-coefficient, and constant
                 repectively in general (standard) form (ax + by = c).
+            precise (bool, optional): Defaults to False. If True, the
+                coefficients are computed in `Decimal` from the string forms
+                of the arguments, which is much slower than the float
+                computation.
         """
 
-        if arg3 is None:
+        if not precise:
+            self.__init_float(arg1, arg2, arg3)
+        elif arg3 is None:
             # two-points form
             if isinstance(arg1, (tuple, list)):
                 arg1 = (Decimal(str(arg1[0])), Decimal(str(arg1[1])))
@@ -44,6 +57,28 @@ class Line2D(object):
             self.x_coef, self.y_coef, self.const = Decimal(
                 arg1), Decimal(arg2), Decimal(arg3)
 
+    def __init_float(self, arg1, arg2, arg3):
+        if arg3 is not None:
+            # general form
+            self.x_coef, self.y_coef, self.const = (
+                float(arg1), float(arg2), float(arg3))
+        elif isinstance(arg1, (tuple, list)):
+            # two-points form
+            x1, y1 = float(arg1[0]), float(arg1[1])
+            x2, y2 = float(arg2[0]), float(arg2[1])
+            if abs(x1 - x2) <= EPSILON:
+                # vertical line
+                self.x_coef, self.y_coef, self.const = 1., 0., x1
+            else:
+                # oblique line
+                m = (y1 - y2) / (x1 - x2)
+                self.x_coef, self.y_coef, self.const = self.si2general(
+                    m, y1 - m * x1)
+        else:
+            # slope-intercept form
+            self.x_coef, self.y_coef, self.const = self.si2general(
+                float(arg1), float(arg2))
+
     def y(self, x):
         return 0 if self.y_coef == 0 else (self.const - self.x_coef * x) / self.y_coef
 
@@ -61,17 +96,14 @@ class Line2D(object):
             ndarray: The point of intersection.
         """
 
-        coefs = np.array([[float(self.x_coef), float(self.y_coef)],
-                          [float(line.x_coef), float(line.y_coef)]])
-        consts = np.array([float(self.const), float(line.const)])
-        try:
-            inter = np.linalg.solve(coefs, consts)
-        except np.linalg.LinAlgError:
+        a1, b1, c1 = float(self.x_coef), float(self.y_coef), float(self.const)
+        a2, b2, c2 = float(line.x_coef), float(line.y_coef), float(line.const)
+        det = a1 * b2 - a2 * b1
+        if abs(det) <= EPSILON * (abs(a1 * b2) + abs(a2 * b1)):
             # infinite or none solution
             return None
-        else:
-            # exactly one solution
-            return inter
+        # exactly one solution by Cramer's rule
+        return np.array([(c1 * b2 - c2 * b1) / det, (a1 * c2 - a2 * c1) / det])
 
     def point_dist(self, pt):
         """Get the distance between a point and self.
@@ -83,9 +115,9 @@ class Line2D(object):
             float: the distance between the given point and self (line).
         """
         return abs(float(self.x_coef) * pt[0]
-                   + float(self.y_coef * pt[1])
-                   - float(self.const)) / math.sqrt(self.x_coef ** 2
-                                                    + self.y_coef ** 2)
+                   + float(self.y_coef) * pt[1]
+                   - float(self.const)) / math.hypot(float(self.x_coef),
+                                                     float(self.y_coef))
 
     @staticmethod
     def si2general(slope, y_intercept):
@@ -105,11 +137,14 @@ class Line2D(object):
 
 
 class LineSeg2D(Line2D):
-    def __init__(self, arg1, arg2):
-        super().__init__(arg1, arg2)
+    __slots__ = ('pt1', 'pt2', 'xmax', 'xmin', 'ymax', 'ymin', 'length')
+
+    def __init__(self, arg1, arg2, precise=False):
+        super().__init__(arg1, arg2, precise=precise)
         self.pt1, self.pt2 = arg1, arg2
         self.xmax, self.xmin = max(arg1[0], arg2[0]), min(arg1[0], arg2[0])
         self.ymax, self.ymin = max(arg1[1], arg2[1]), min(arg1[1], arg2[1])
+        self.length = dist(arg1, arg2)
 
     def intersection(self, line):
         """Get the point of intersection between self (a line segment) and a
@@ -145,7 +180,7 @@ class LineSeg2D(Line2D):
                 if (self.ymin <= inter[1] <= self.ymax
                         and line.xmin <= inter[0] <= line.xmax):
                     return inter
-            elif line.ranging_pt1[0] - line.pt2[0] == 0:
+            elif line.pt1[0] - line.pt2[0] == 0:
                 # vertical line segment (line)
                 if (line.ymin <= inter[1] <= line.ymax
                         and self.xmin <= inter[0] <= self.xmax):
@@ -169,7 +204,7 @@ class LineSeg2D(Line2D):
             float: the distance between the given point and self (line segment).
         """
 
-        seg_len = dist(self.pt1, self.pt2)
+        seg_len = self.length
         if seg_len == 0:
             return dist(pt, self.pt1)
         t = max(0, min(1, ((pt[0] - self.pt1[0])
@@ -180,7 +215,25 @@ class LineSeg2D(Line2D):
         return dist(pt, (self.pt1[0] + t * (self.pt2[0] - self.pt1[0]),
                          self.pt1[1] + t * (self.pt2[1] - self.pt1[1])))
 
+    def seg_dist(self, seg):
+        """Get the distance between self and another line segment. A circle
+        moving along one segment touches the other one if the distance is not
+        larger than its radius.
+
+        Args:
+            seg (LineSeg2D): the target line segment.
+
+        Returns:
+            float: the distance between two line segments, which is 0 if they
+            intersect.
+        """
+
+        if self.intersection(seg) is not None:
+            return 0.
+        return min(self.point_dist(seg.pt1), self.point_dist(seg.pt2),
+                   seg.point_dist(self.pt1), seg.point_dist(self.pt2))
+
 
 def dist(pt0, pt1):
     """Return the distance between pt0 and pt1."""
-    return math.sqrt(sum(map(lambda a, b: (a - b)**2, pt0, pt1)))
+    return math.hypot(pt0[0] - pt1[0], pt0[1] - pt1[1])
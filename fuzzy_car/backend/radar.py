@@ -0,0 +1,209 @@
+"""Define the precomputed radar distances of a fixed map."""
+
+import json
+import math
+
+import numpy as np
+
+from .raycast import chunk_slices, ray_dists, walls_to_array
+
+# a sample of radar: the distance to the closest wall (NaN if no wall is hit)
+# and the index of that wall (-1 if no wall is hit)
+RADAR_DTYPE = np.dtype([('dist', np.float32), ('wall', np.int32)])
+
+
+class RadarTable(object):
+    def __init__(self, samples, x_min, y_min, cell_size, tolerance=1.0,
+                 max_error=None, mean_error=None, hit_rate=None):
+        """The radar samples from every position and heading on a
+        (x, y, heading) grid. The queries are answered by trilinear
+        interpolation of the distances. The distance jumps where the radar
+        passes by the end of a wall, so a query is only answered when the 8
+        samples around it hit the same wall and their distances differ by at
+        most `tolerance`, and the rest should be cast exactly. Use `build` to
+        create the table, and `load` to share a saved one between processes by
+        memory mapping.
+
+        Args:
+            samples (ndarray): an (nx, ny, n_headings) array of `RADAR_DTYPE`,
+                where the headings are evenly spaced in [0, 360).
+            x_min (float): the x-coordinate of the first position.
+            y_min (float): the y-coordinate of the first position.
+            cell_size (float): the spacing of positions.
+            tolerance (float, optional): Defaults to 1.0. The largest spread of
+                the distances around an answered query.
+            max_error (float, optional): Defaults to None. The maximum error of
+                answered queries against the exact ray casting measured by
+                `build`.
+            mean_error (float, optional): Defaults to None. The mean error of
+                answered queries measured by `build`.
+            hit_rate (float, optional): Defaults to None. The ratio of queries
+                answered by the table measured by `build`.
+        """
+
+        self.samples = samples
+        self.x_min, self.y_min, self.cell_size = x_min, y_min, cell_size
+        self.heading_step = 360 / samples.shape[2]
+        self.tolerance = tolerance
+        self.max_error, self.mean_error = max_error, mean_error
+        self.hit_rate = hit_rate
+
+    @classmethod
+    def build(cls, wall_points, path=None, cell_size=0.5, heading_step=1,
+              tolerance=1.0, margin=0, validation=1000, seed=0):
+        """Cast the radars at every position and heading of the grid covering
+        the map. The error bound and the hit rate are measured at random poses
+        in the grid.
+
+        Args:
+            wall_points (list): a list with all the edge points of the map.
+            path (string, optional): Defaults to None. If given, the table is
+                written into this `.npy` file (memory mapped while building)
+                with the metadata in `path + '.json'`.
+            cell_size (float, optional): Defaults to 0.5. The spacing of
+                positions.
+            heading_step (float, optional): Defaults to 1. The spacing of
+                headings in degree, which should divide 360.
+            tolerance (float, optional): Defaults to 1.0. The largest spread of
+                the distances around an answered query.
+            margin (float, optional): Defaults to 0. The extra border of grid
+                around the bounding box of walls.
+            validation (int, optional): Defaults to 1000. The # of random poses
+                to measure the error against exact ray casting.
+            seed (int, optional): Defaults to 0. The seed of random poses.
+
+        Returns:
+            RadarTable: the built table.
+        """
+
+        walls = walls_to_array(wall_points)
+        x_min = walls[:, 0::2].min() - margin
+        y_min = walls[:, 1::2].min() - margin
+        nx = int(math.ceil((walls[:, 0::2].max() + margin - x_min)
+                           / cell_size)) + 1
+        ny = int(math.ceil((walls[:, 1::2].max() + margin - y_min)
+                           / cell_size)) + 1
+        n_headings = int(round(360 / heading_step))
+        shape = (nx, ny, n_headings)
+        if path is None:
+            samples = np.empty(shape, dtype=RADAR_DTYPE)
+        else:
+            samples = np.lib.format.open_memmap(path, mode='w+',
+                                                dtype=RADAR_DTYPE, shape=shape)
+
+        headings = np.radians(np.arange(n_headings) * 360 / n_headings)
+        dx = np.cos(headings)[np.newaxis, :, np.newaxis]
+        dy = np.sin(headings)[np.newaxis, :, np.newaxis]
+        xs, ys = np.meshgrid(x_min + np.arange(nx) * cell_size,
+                             y_min + np.arange(ny) * cell_size, indexing='ij')
+        xs, ys = xs.ravel(), ys.ravel()
+        flat = samples.reshape(-1, n_headings)
+        # bound the (chunk, headings, walls) arrays
+        for chunk in chunk_slices(len(xs), n_headings * len(walls)):
+            origin = (xs[chunk, np.newaxis, np.newaxis],
+                      ys[chunk, np.newaxis, np.newaxis])
+            dists = ray_dists(walls, origin, dx, dy)
+            closest = np.argmin(dists, axis=2)
+            dists = np.take_along_axis(dists, closest[..., np.newaxis],
+                                       axis=2)[..., 0]
+            missed = np.isinf(dists)
+            flat['dist'][chunk] = np.where(missed, np.nan, dists)
+            flat['wall'][chunk] = np.where(missed, -1, closest)
+
+        table = cls(samples, x_min, y_min, cell_size, tolerance)
+        if validation:
+            rng = np.random.RandomState(seed)
+            poses = np.column_stack((
+                rng.uniform(x_min, x_min + (nx - 1) * cell_size, validation),
+                rng.uniform(y_min, y_min + (ny - 1) * cell_size, validation),
+                rng.uniform(0, 360, validation)))
+            radians = np.radians(poses[:, 2])[:, np.newaxis]
+            exact = np.min(ray_dists(walls, (poses[:, 0:1], poses[:, 1:2]),
+                                     np.cos(radians), np.sin(radians)), axis=1)
+            exact[np.isinf(exact)] = np.nan
+            dists, answered = table.lookup(poses)
+            table.hit_rate = float(np.mean(answered))
+            errors = np.abs(dists - exact)[answered]
+            # both are NaN when neither hits a wall
+            errors[np.isnan(errors)] = 0
+            if len(errors):
+                table.max_error = float(np.max(errors))
+                table.mean_error = float(np.mean(errors))
+
+        if path is not None:
+            samples.flush()
+            with open(path + '.json', 'w') as metafile:
+                json.dump({'x_min': float(x_min), 'y_min': float(y_min),
+                           'cell_size': cell_size, 'tolerance': tolerance,
+                           'max_error': table.max_error,
+                           'mean_error': table.mean_error,
+                           'hit_rate': table.hit_rate}, metafile)
+        return table
+
+    @classmethod
+    def load(cls, path):
+        """Load the table saved by `build` in read-only memory mapping, so the
+        processes loading the same file share the memory."""
+        with open(path + '.json') as metafile:
+            meta = json.load(metafile)
+        return cls(np.load(path, mmap_mode='r'), **meta)
+
+    def distance(self, pos, angle):
+        """Get the interpolated distance between a position and the closest wall
+        in a direction.
+
+        Args:
+            pos (tuple): (x, y) of the position.
+            angle (float): the direction in degree.
+
+        Returns:
+            float: the distance, NaN if the radar hits no wall, or None if the
+            query cannot be answered by the table.
+        """
+
+        dists, answered = self.lookup(((pos[0], pos[1], angle),))
+        return float(dists[0]) if answered[0] else None
+
+    def lookup(self, poses):
+        """Get the interpolated distances of many poses at once.
+
+        Args:
+            poses (array_like): an (M, 3) array of (x, y, angle in degree).
+
+        Returns:
+            tuple: (distances, answered) of M elements. The distances are NaN
+            for the radars hitting no wall, and `answered` is False for the
+            poses out of the grid or near a jump of distance, whose distances
+            are meaningless.
+        """
+
+        poses = np.asarray(poses, dtype=float)
+        nx, ny, n_headings = self.samples.shape
+        u = (poses[:, 0] - self.x_min) / self.cell_size
+        v = (poses[:, 1] - self.y_min) / self.cell_size
+        inside = (u >= 0) & (u <= nx - 1) & (v >= 0) & (v <= ny - 1)
+        u, v = np.clip(u, 0, nx - 1), np.clip(v, 0, ny - 1)
+        w = (poses[:, 2] % 360) / self.heading_step
+        rows = np.minimum(u.astype(int), nx - 2)
+        cols = np.minimum(v.astype(int), ny - 2)
+        headings = np.minimum(w.astype(int), n_headings - 1)
+        u, v, w = u - rows, v - cols, w - headings
+
+        # the 8 samples around the poses, and the headings are periodic
+        corners = []
+        weights = []
+        for heading, h_weight in ((headings, 1 - w),
+                                  ((headings + 1) % n_headings, w)):
+            for row, r_weight in ((rows, 1 - u), (rows + 1, u)):
+                for col, c_weight in ((cols, 1 - v), (cols + 1, v)):
+                    corners.append(self.samples[row, col, heading])
+                    weights.append(h_weight * r_weight * c_weight)
+        corners = np.stack(corners)
+        dists = corners['dist'].astype(float)
+
+        with np.errstate(invalid='ignore'):
+            spread = np.max(dists, axis=0) - np.min(dists, axis=0)
+        same_wall = np.all(corners['wall'] == corners['wall'][0], axis=0)
+        answered = inside & same_wall & ((corners['wall'][0] < 0)
+                                         | (spread <= self.tolerance))
+        return np.sum(np.stack(weights) * dists, axis=0), answered
@@ -0,0 +1,125 @@
+"""Define the ray casting against the walls of map in vectorized form."""
+
+import numpy as np
+
+from .planecoord import EPSILON
+
+
+def walls_to_array(wall_points):
+    """Convert the edge points of map into the wall segments.
+
+    Args:
+        wall_points (list): a list with all the edge points of the map.
+
+    Returns:
+        ndarray: an (N, 4) array where each row is (x1, y1, x2, y2) of a wall.
+    """
+
+    points = np.asarray(wall_points, dtype=float).reshape(-1, 2)
+    return np.hstack((points[:-1], points[1:]))
+
+
+def as_wall_array(wall_points):
+    """Get the wall segments of a map without copying them if they are
+    already converted by `walls_to_array`.
+
+    Args:
+        wall_points (list or ndarray): a list with all the edge points of the
+            map, or the (N, 4) array of wall segments.
+
+    Returns:
+        ndarray: an (N, 4) array where each row is (x1, y1, x2, y2) of a wall.
+    """
+
+    if isinstance(wall_points, np.ndarray) and wall_points.ndim == 2 \
+            and wall_points.shape[1] == 4:
+        return wall_points
+    return walls_to_array(wall_points)
+
+
+def chunk_slices(count, per_item, limit=2**22):
+    """Split `count` items into slices, so the intermediate arrays of a chunk
+    with `per_item` elements for each item are bounded to about `limit`
+    (4M by default) elements.
+
+    Args:
+        count (int): the # of items.
+        per_item (int): the # of elements of the intermediate arrays for each
+            item, e.g. the # of rays times the # of walls.
+        limit (int, optional): Defaults to 2**22. The # of elements of a chunk.
+
+    Returns:
+        list: the slices of the chunks.
+    """
+
+    size = max(1, limit // per_item)
+    return [slice(start, start + size) for start in range(0, count, size)]
+
+
+def cast_ray(walls, origin, angle):
+    """Get the closest intersection between a ray and the walls.
+
+    Args:
+        walls (ndarray): an (N, 4) array of wall segments.
+        origin (tuple): (x, y) position where the ray starts.
+        angle (float): the direction of the ray in degree.
+
+    Returns:
+        tuple: (intersection, distance), or (None, nan) if the ray hits no
+        wall.
+    """
+
+    points, dists = cast_rays(walls, origin, (angle,))
+    if np.isnan(dists[0]):
+        return None, dists[0]
+    return points[0], dists[0]
+
+
+def cast_rays(walls, origin, angles):
+    """Get the closest intersections between many rays from the same origin
+    and the walls at once.
+
+    Args:
+        walls (ndarray): an (N, 4) array of wall segments.
+        origin (tuple): (x, y) position where the rays start.
+        angles (array_like): the M directions of the rays in degree.
+
+    Returns:
+        tuple: (intersections, distances) in the shape of (M, 2) and (M,),
+        which are NaN for the rays hitting no wall.
+    """
+
+    radians = np.radians(np.asarray(angles, dtype=float))
+    dx, dy = np.cos(radians), np.sin(radians)
+    dists = np.min(ray_dists(walls, origin, dx[:, np.newaxis],
+                             dy[:, np.newaxis]), axis=1)
+    dists[np.isinf(dists)] = np.nan
+    points = np.column_stack((origin[0] + dists * dx, origin[1] + dists * dy))
+    return points, dists
+
+
+def ray_dists(walls, origin, dx, dy):
+    """Get the distances from the origin to every wall along the rays by
+    solving `origin + t * (dx, dy) == p1 + u * (p2 - p1)`.
+
+    Args:
+        walls (ndarray): an (N, 4) array of wall segments.
+        origin (tuple): (x, y) position where the rays start.
+        dx (float or ndarray): x component of the unit direction of rays.
+        dy (float or ndarray): y component of the unit direction of rays.
+
+    Returns:
+        ndarray: the distances broadcast from the walls and the directions,
+        which are inf if the ray does not hit the wall.
+    """
+
+    ex, ey = walls[:, 2] - walls[:, 0], walls[:, 3] - walls[:, 1]
+    wx, wy = walls[:, 0] - origin[0], walls[:, 1] - origin[1]
+
+    denom = dx * ey - dy * ex
+    parallel = np.abs(denom) <= EPSILON * np.hypot(ex, ey)
+    denom = np.where(parallel, 1, denom)
+    t = (wx * ey - wy * ex) / denom
+    u = (wx * dy - wy * dx) / denom
+    hit = ~parallel & (t > 0) & (u >= -EPSILON) & (u <= 1 + EPSILON)
+    return np.where(hit, t, np.inf)
@@ -1,77 +1,186 @@
-import time
-
 from PySide2.QtCore import QThread, Signal, Slot
 
+from .export import EXPORTERS
+from .pacing import FramePacer
+from .simulation import ARRIVED, COLLIDED, NO_READING, Simulation
+from .surface import ControlSurface
+
 
 class RunCar(QThread):
     sig_console = Signal(str)
     sig_car = Signal(list, float, float)
     sig_car_collided = Signal()
     sig_dists = Signal(list, list, list)
-    sig_results = Signal(list)
+    sig_results = Signal(object)
+
+    def __init__(self, car, fuzzy_system, ending_area=None, fps=20, speed=1,
+                 trajectory=None, step_length=1, max_substep=1):
+        """Run the simulation in a thread and emit the state of car for
+        displaying. The simulation steps at `fps * speed` steps per second,
+        and the latest state is emitted at `fps` frames per second, so the
+        steps between two frames are not displayed.
+
+        Args:
+            car (Car): the car to drive.
+            fuzzy_system (FuzzySystem or ControlSurface): the controller.
+            ending_area (tuple): (left top, right bottom) corners of the ending
+                area.
+            fps (int, optional): Defaults to 20. The displaying rate.
+            speed (float, optional): Defaults to 1. The # of simulation steps
+                per frame, or 0 to run the simulation as fast as possible.
+            trajectory (TrajectoryRecorder, optional): Defaults to None. The
+                recorder of steps, e.g. with sinks streaming them to disk. It
+                is flushed when the run is finished or stopped, but the caller
+                owns it and must `close` it to close the files of its sinks.
+            step_length (float, optional): Defaults to 1. The length of
+                movement of each step.
+            max_substep (float, optional): Defaults to 1. The longest length of
+                a sub-step checked for collision.
+        """
 
-    def __init__(self, car, fuzzy_system, ending_area=None, fps=20):
         super().__init__()
         self.car = car
         self.fuzzy_system = fuzzy_system
         self.abort = False
         self.ending_lt = ending_area[0]
         self.ending_rb = ending_area[1]
-        self.waiting_time = 1 / fps
+        self.frame_pacer = FramePacer(fps)
+        self.step_pacer = FramePacer(fps * speed) if speed > 0 else None
+        self.trajectory = trajectory
+        self.step_length, self.max_substep = step_length, max_substep
 
     @Slot()
     def run(self):
-        results = list()
-        radar_dir = ['front', 'left', 'right']
-        while True:
-            if self.abort:
-                break
-            time.sleep(self.waiting_time)
-            radars = tuple(self.car.dist(d) for d in radar_dir)
-            self.sig_car.emit(self.car.pos, self.car.angle,
-                              self.car.wheel_angle)
-            self.sig_dists.emit(self.car.pos, *map(list, zip(*radars)))
-
-            if (self.ending_lt[0] <= self.car.pos[0] <= self.ending_rb[0]
-                    and self.ending_lt[1] >= self.car.pos[1] >= self.ending_rb[1]):
+        simulation = Simulation(self.car, self.fuzzy_system,
+                                (self.ending_lt, self.ending_rb),
+                                max_steps=None, trajectory=self.trajectory,
+                                step_length=self.step_length,
+                                max_substep=self.max_substep)
+        self.frame_pacer.reset()
+        if self.step_pacer is not None:
+            self.step_pacer.reset()
+        while not self.abort:
+            if self.step_pacer is not None:
+                self.step_pacer.wait()
+            pos = list(self.car.pos)
+            angle, wheel_angle = self.car.angle, self.car.wheel_angle
+            outcome = simulation.step()
+
+            if self.frame_pacer.due() or outcome is not None:
+                self.sig_car.emit(pos, angle, wheel_angle)
+                self.sig_dists.emit(pos, *map(list, zip(*simulation.radars)))
+
+            if outcome == ARRIVED:
                 self.sig_console.emit("Note: Car has arrived at the ending "
                                       "area.")
-                self.abort = True
-                break
-
-            if self.car.is_collided:
+            elif outcome == COLLIDED:
                 self.sig_console.emit("Note: Car has collided.")
                 self.sig_car_collided.emit()
-                self.abort = True
-                break
-
-            dists = list(zip(*radars))[1]
-            try:
-                dists = list(map(float, dists))
-            except ValueError:
-                self.abort = True
+            elif outcome == NO_READING:
                 self.sig_console.emit("Error: Cannot input the fuzzy system "
                                       "since the distance type error.")
-                break
+            if outcome is not None:
+                self.abort = True
+        self.sig_console.emit(
+            "Note: Displayed %.1f of %d fps with %d late and %d skipped "
+            "frames." % (self.frame_pacer.achieved_fps,
+                         self.frame_pacer.target_fps,
+                         self.frame_pacer.late_frames,
+                         self.frame_pacer.skipped_frames))
+        # the run may be interrupted before it is finished
+        simulation.trajectory.flush()
+        self.sig_results.emit(simulation.trajectory)
 
-            next_wheel_angle = self.fuzzy_system.singleton_result(
-                dists[0], dists[1] - dists[2])
+    @Slot()
+    def stop(self):
+        if self.isRunning():
+            self.sig_console.emit("WARNING: User interrupts running thread.")
 
-            results.append({
-                'x': self.car.pos[0],
-                'y': self.car.pos[1],
-                'front_dist': radars[0][1],
-                'right_dist': radars[2][1],
-                'left_dist': radars[1][1],
-                'wheel_angle': next_wheel_angle
-            })
+        self.abort = True
 
-            self.car.move(next_wheel_angle)
-        self.sig_results.emit(results)
+
+class ExportResults(QThread):
+    sig_console = Signal(str)
+    sig_progress = Signal(int)
+
+    def __init__(self, records, save_dir, export_format='train'):
+        """Export the records of trajectory in a thread, so the GUI is not
+        blocked while saving.
+
+        Args:
+            records (ndarray): the records of `TRAJECTORY_DTYPE`.
+            save_dir (string): the saving directory.
+            export_format (string, optional): Defaults to 'train'. The name of
+                exporter in `EXPORTERS`.
+        """
+
+        super().__init__()
+        self.records = records
+        self.save_dir = save_dir
+        self.exporter = EXPORTERS[export_format]
+
+    @Slot()
+    def run(self):
+        try:
+            filepaths = self.exporter(self.records, self.save_dir,
+                                      self.__progress)
+        except OSError as err:
+            self.sig_console.emit("Error: Cannot save the results. %s" % err)
+        else:
+            self.sig_console.emit(
+                'Note: Detailed results have been saved in %s.' % ' and '.join(
+                    '"%s"' % filepath for filepath in filepaths))
 
     @Slot()
     def stop(self):
-        if self.isRunning():
-            self.sig_console.emit("WARNING: User interrupts running thread.")
+        """The exporting is never interrupted, so the files are complete."""
+
+    def __progress(self, done, total):
+        self.sig_progress.emit(100 * done // total if total else 100)
+
+
+class BuildControlSurface(QThread):
+    sig_console = Signal(str)
+
+    def __init__(self, fuzzy_system, x_range, y_range, resolution=101):
+        """Build the `ControlSurface` of a fuzzy system in a thread, so the GUI
+        is not blocked by the inference over the whole grid and the samples of
+        its error, e.g. about 4 s at the resolution 201 and 30 s at 501. The
+        surface is kept in `self.surface` when the thread is finished, which
+        is None if it is stopped.
 
+        Args:
+            fuzzy_system (FuzzySystem): the compiled fuzzy system.
+            x_range (tuple): (min, max) of the first crisp input.
+            y_range (tuple): (min, max) of the second crisp input.
+            resolution (int or tuple, optional): Defaults to 101. The # of grid
+                points for each input.
+        """
+
+        super().__init__()
+        self.fuzzy_system = fuzzy_system
+        self.x_range, self.y_range = x_range, y_range
+        self.resolution = resolution
+        self.surface = None
+        self.abort = False
+
+    @Slot()
+    def run(self):
+        self.sig_console.emit('Note: Building the lookup table...')
+        surface = ControlSurface(self.fuzzy_system, self.x_range,
+                                 self.y_range, self.resolution)
+        if self.abort:
+            self.sig_console.emit('Note: Building the lookup table has been '
+                                  'stopped.')
+            return
+        self.surface = surface
+        self.sig_console.emit(
+            'Note: Lookup table (%d x %d) has been built with the maximum '
+            'error about %f (sampled estimate).' % (*surface.table.shape,
+                                                    surface.max_error))
+
+    @Slot()
+    def stop(self):
+        """Drop the surface being built, since the inference of the grid
+        cannot be interrupted."""
         self.abort = True
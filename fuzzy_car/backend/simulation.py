@@ -0,0 +1,112 @@
+"""Define the headless simulation driving a `Car` by a fuzzy system."""
+
+import collections
+import time
+
+from .trajectory import TrajectoryRecorder
+
+# the outcomes of a simulation
+ARRIVED = 'arrived'
+COLLIDED = 'collided'
+NO_READING = 'no reading'
+STEP_LIMIT = 'step limit'
+
+RADAR_DIRECTIONS = ('front', 'left', 'right')
+
+SimulationResult = collections.namedtuple('SimulationResult',
+                                          ['outcome', 'trajectory'])
+
+
+class Simulation(object):
+    def __init__(self, car, fuzzy_system, ending_area, max_steps=1000,
+                 trajectory=None, step_length=1, max_substep=1):
+        """The simulation of a car driven by a fuzzy system without any pacing
+        or GUI, which runs as fast as possible. Each step reads the radars,
+        checks if the car arrives at the ending area, collides or loses a
+        radar reading, and otherwise records the step and moves the car.
+
+        Args:
+            car (Car): the car to drive, which is moved in place.
+            fuzzy_system (FuzzySystem or ControlSurface): the controller taking
+                the front distance and the left minus right distance.
+            ending_area (tuple): (left top, right bottom) corners of the ending
+                area.
+            max_steps (int, optional): Defaults to 1000. The step limit, or
+                None for no limit.
+            trajectory (TrajectoryRecorder, optional): Defaults to None. The
+                recorder of steps, e.g. with sinks streaming them to disk. It
+                is flushed when the simulation is finished, but the caller
+                owns it and must `close` it to close the files of its sinks.
+                A new recorder is created and closed by the simulation if not
+                given.
+            step_length (float, optional): Defaults to 1. The length of
+                movement of each step, which is passed to `Car.move`.
+            max_substep (float, optional): Defaults to 1. The longest length of
+                a sub-step checked for collision.
+        """
+
+        self.car = car
+        self.fuzzy_system = fuzzy_system
+        self.ending_lt, self.ending_rb = ending_area
+        self.max_steps = max_steps
+        self.step_length, self.max_substep = step_length, max_substep
+        self.radars = None
+        self.outcome = None
+        self.__owns_trajectory = trajectory is None
+        self.trajectory = TrajectoryRecorder() if trajectory is None \
+            else trajectory
+
+    def step(self):
+        """Advance the simulation by one step.
+
+        Returns:
+            string: the outcome if the simulation is finished, otherwise None.
+        """
+
+        if self.outcome is not None:
+            return self.outcome
+
+        car = self.car
+        start_time = time.perf_counter()
+        self.radars = tuple(car.dist(d) for d in RADAR_DIRECTIONS)
+        if (self.ending_lt[0] <= car.pos[0] <= self.ending_rb[0]
+                and self.ending_lt[1] >= car.pos[1] >= self.ending_rb[1]):
+            return self.__finish(ARRIVED)
+        if car.is_collided:
+            return self.__finish(COLLIDED)
+        try:
+            dists = [float(radar[1]) for radar in self.radars]
+        except ValueError:
+            return self.__finish(NO_READING)
+        if self.max_steps is not None and \
+                self.trajectory.total >= self.max_steps:
+            return self.__finish(STEP_LIMIT)
+
+        next_wheel_angle = self.fuzzy_system.singleton_result(
+            dists[0], dists[1] - dists[2])
+        x, y, angle = car.pos[0], car.pos[1], car.angle
+        car.move(next_wheel_angle, self.step_length, self.max_substep)
+        self.trajectory.append(x, y, angle, next_wheel_angle, dists[0],
+                               dists[1], dists[2],
+                               time.perf_counter() - start_time)
+        return None
+
+    def __finish(self, outcome):
+        self.outcome = outcome
+        if self.__owns_trajectory:
+            self.trajectory.close()
+        else:
+            self.trajectory.flush()
+        return outcome
+
+    def run(self):
+        """Run the simulation to completion.
+
+        Returns:
+            SimulationResult: (outcome, trajectory), where the trajectory is a
+            `TrajectoryRecorder` of the recorded steps.
+        """
+
+        while self.step() is None:
+            pass
+        return SimulationResult(self.outcome, self.trajectory)
@@ -0,0 +1,354 @@
+"""Define the spatial index and the distance field over the walls of map."""
+
+import math
+
+import numpy as np
+
+from .interpolation import bilinear
+from .raycast import chunk_slices, ray_dists, walls_to_array
+
+
+class WallGrid(object):
+    def __init__(self, walls, cell_size=None):
+        """A uniform grid over the walls of a map. Each cell keeps the walls
+        whose bounding boxes overlap it, so the ray casting only tests the walls
+        in the cells along the ray (by DDA traversal), and the collision check
+        only tests the walls near the car. Build it once per map and share it
+        between cars.
+
+        Args:
+            walls (ndarray): an (N, 4) array of wall segments.
+            cell_size (float, optional): Defaults to None. The side length of
+                cells. If None, it is the mean length of walls.
+        """
+
+        self.walls = np.asarray(walls, dtype=float)
+        if cell_size is None:
+            cell_size = np.mean(np.hypot(self.walls[:, 2] - self.walls[:, 0],
+                                         self.walls[:, 3] - self.walls[:, 1]))
+        xs, ys = self.walls[:, 0::2], self.walls[:, 1::2]
+        self.x_min, self.y_min = xs.min(), ys.min()
+        # at least one cell even if the map is degenerate
+        self.cell_size = max(cell_size, 1e-9)
+        self.nx = int((xs.max() - self.x_min) // self.cell_size) + 1
+        self.ny = int((ys.max() - self.y_min) // self.cell_size) + 1
+        self.x_max = self.x_min + self.nx * self.cell_size
+        self.y_max = self.y_min + self.ny * self.cell_size
+
+        # the cells covered by the bounding box of each wall
+        ix0, ix1 = self.__cell_x(xs.min(axis=1)), self.__cell_x(xs.max(axis=1))
+        iy0, iy1 = self.__cell_y(ys.min(axis=1)), self.__cell_y(ys.max(axis=1))
+        widths = ix1 - ix0 + 1
+        counts = widths * (iy1 - iy0 + 1)
+        wall_ids = np.repeat(np.arange(len(self.walls)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                    counts)
+        cells = ((ix0[wall_ids] + local % widths[wall_ids]) * self.ny
+                 + iy0[wall_ids] + local // widths[wall_ids])
+
+        # the walls of cell i are `cell_walls[cell_starts[i]:cell_starts[i+1]]`
+        order = np.argsort(cells, kind='stable')
+        self.__cell_walls = wall_ids[order]
+        self.__cell_starts = np.searchsorted(cells[order],
+                                             np.arange(self.nx * self.ny + 1))
+
+    @classmethod
+    def from_points(cls, wall_points, cell_size=None):
+        """Create the grid from the edge points of map."""
+        return cls(walls_to_array(wall_points), cell_size)
+
+    def walls_near(self, point, radius):
+        """Get the walls in the cells within `radius` of the point.
+
+        Args:
+            point (tuple): (x, y) of the point.
+            radius (float): the searching radius.
+
+        Returns:
+            ndarray: an (M, 4) array of the nearby wall segments.
+        """
+
+        ix0, ix1 = self.__cell_x(point[0] - radius), self.__cell_x(point[0] + radius)
+        iy0, iy1 = self.__cell_y(point[1] - radius), self.__cell_y(point[1] + radius)
+        ids = [self.__walls_in(ix, iy)
+               for ix in range(ix0, ix1 + 1) for iy in range(iy0, iy1 + 1)]
+        return self.walls[np.unique(np.concatenate(ids))]
+
+    def cast_ray(self, origin, angle):
+        """Get the closest intersection between a ray and the walls by
+        traversing the cells along the ray.
+
+        Args:
+            origin (tuple): (x, y) position where the ray starts.
+            angle (float): the direction of the ray in degree.
+
+        Returns:
+            tuple: (intersection, distance), or (None, nan) if the ray hits no
+            wall.
+        """
+
+        dx, dy = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+
+        # clip the ray by the bounding box of grid
+        t_enter, t_exit = 0, math.inf
+        for o, d, lo, hi in ((origin[0], dx, self.x_min, self.x_max),
+                             (origin[1], dy, self.y_min, self.y_max)):
+            if d == 0:
+                if not lo <= o <= hi:
+                    return None, math.nan
+            else:
+                t_lo, t_hi = (lo - o) / d, (hi - o) / d
+                t_enter = max(t_enter, min(t_lo, t_hi))
+                t_exit = min(t_exit, max(t_lo, t_hi))
+        if t_enter > t_exit:
+            return None, math.nan
+
+        ix = self.__cell_x(origin[0] + t_enter * dx)
+        iy = self.__cell_y(origin[1] + t_enter * dy)
+        step_x, t_next_x, t_delta_x = self.__dda_axis(
+            origin[0], dx, ix, self.x_min)
+        step_y, t_next_y, t_delta_y = self.__dda_axis(
+            origin[1], dy, iy, self.y_min)
+
+        best = math.inf
+        while 0 <= ix < self.nx and 0 <= iy < self.ny:
+            ids = self.__walls_in(ix, iy)
+            if len(ids):
+                best = min(best, ray_dists(self.walls[ids], origin, dx, dy).min())
+            # a hit farther than this cell may be blocked in the next cells
+            if best <= min(t_next_x, t_next_y):
+                break
+            if t_next_x < t_next_y:
+                ix += step_x
+                t_next_x += t_delta_x
+            else:
+                iy += step_y
+                t_next_y += t_delta_y
+
+        if math.isinf(best):
+            return None, math.nan
+        return np.array([origin[0] + best * dx, origin[1] + best * dy]), best
+
+    def cast_rays(self, origin, angles):
+        """Get the closest intersections between many rays from the same origin
+        and the walls.
+
+        Args:
+            origin (tuple): (x, y) position where the rays start.
+            angles (array_like): the M directions of the rays in degree.
+
+        Returns:
+            tuple: (intersections, distances) in the shape of (M, 2) and (M,),
+            which are NaN for the rays hitting no wall.
+        """
+
+        angles = np.ravel(angles)
+        points = np.full((len(angles), 2), np.nan)
+        dists = np.full(len(angles), np.nan)
+        for idx, angle in enumerate(angles):
+            point, dists[idx] = self.cast_ray(origin, angle)
+            if point is not None:
+                points[idx] = point
+        return points, dists
+
+    def __walls_in(self, ix, iy):
+        cell = ix * self.ny + iy
+        return self.__cell_walls[self.__cell_starts[cell]:
+                                 self.__cell_starts[cell + 1]]
+
+    def __cell_x(self, x):
+        return np.clip(np.floor_divide(x - self.x_min, self.cell_size),
+                       0, self.nx - 1).astype(int)
+
+    def __cell_y(self, y):
+        return np.clip(np.floor_divide(y - self.y_min, self.cell_size),
+                       0, self.ny - 1).astype(int)
+
+    def __dda_axis(self, origin, direction, idx, minimum):
+        """Get the step, the distance to the next cell boundary and the
+        distance between cell boundaries along the ray on an axis."""
+
+        if direction > 0:
+            boundary = minimum + (idx + 1) * self.cell_size
+            return 1, (boundary - origin) / direction, self.cell_size / direction
+        if direction < 0:
+            boundary = minimum + idx * self.cell_size
+            return -1, (boundary - origin) / direction, -self.cell_size / direction
+        return 0, math.inf, math.inf
+
+
+class DistanceField(object):
+    def __init__(self, walls, cell_size=0.5, margin=5, signed=None):
+        """The signed distance to the closest wall sampled on a grid, which is
+        positive inside the map (the polygon enclosed by the walls) and
+        negative outside. The queries are answered by bilinear interpolation,
+        whose error is at most `cell_size` / sqrt(2) since the distance varies
+        no faster than the position. Build it once per map and `save` it to
+        skip the building next time.
+
+        Args:
+            walls (ndarray): an (N, 4) array of wall segments.
+            cell_size (float, optional): Defaults to 0.5. The spacing of grid.
+            margin (float, optional): Defaults to 5. The extra border of grid
+                around the bounding box of walls.
+            signed (bool, optional): Defaults to None. If False, the distances
+                are always positive. If None, the distances are signed only if
+                the walls are a closed polygon.
+        """
+
+        walls = np.asarray(walls, dtype=float)
+        if signed is None:
+            signed = np.array_equal(walls[0, :2], walls[-1, 2:])
+        self.x_min = walls[:, 0::2].min() - margin
+        self.y_min = walls[:, 1::2].min() - margin
+        self.cell_size = cell_size
+        nx = int(math.ceil((walls[:, 0::2].max() + margin - self.x_min)
+                           / cell_size)) + 1
+        ny = int(math.ceil((walls[:, 1::2].max() + margin - self.y_min)
+                           / cell_size)) + 1
+        xs, ys = np.meshgrid(self.x_min + np.arange(nx) * cell_size,
+                             self.y_min + np.arange(ny) * cell_size,
+                             indexing='ij')
+        points = np.column_stack((xs.ravel(), ys.ravel()))
+        values = np.empty(len(points))
+        # bound the (chunk, N) intermediate arrays
+        for chunk in chunk_slices(len(points), len(walls)):
+            dists = np.min(point_segment_dists(
+                walls, points[chunk].T[..., np.newaxis]), axis=1)
+            if signed:
+                dists = np.where(is_inside(walls, points[chunk]), dists,
+                                 -dists)
+            values[chunk] = dists
+        self.values = values.reshape(nx, ny)
+
+    @classmethod
+    def from_points(cls, wall_points, *args, **kwargs):
+        """Create the distance field from the edge points of map."""
+        return cls(walls_to_array(wall_points), *args, **kwargs)
+
+    def save(self, path):
+        """Save the distance field into a `.npz` file."""
+        np.savez(path, values=self.values,
+                 origin=(self.x_min, self.y_min, self.cell_size))
+
+    @classmethod
+    def load(cls, path):
+        """Load the distance field saved by `save`."""
+        with np.load(path) as data:
+            field = cls.__new__(cls)
+            field.values = data['values']
+            field.x_min, field.y_min, field.cell_size = data['origin']
+        return field
+
+    def distance(self, point):
+        """Get the signed distance between the point and the closest wall. The
+        points out of the grid are clipped onto the border of grid.
+
+        Args:
+            point (tuple): (x, y) of the point.
+
+        Returns:
+            float: the interpolated signed distance.
+        """
+
+        return bilinear(self.values, (point[0] - self.x_min) / self.cell_size,
+                        (point[1] - self.y_min) / self.cell_size)
+
+    def distances(self, points):
+        """Get the signed distances of many points at once.
+
+        Args:
+            points (array_like): an (M, 2) array of points.
+
+        Returns:
+            ndarray: the M interpolated signed distances.
+        """
+
+        points = np.asarray(points, dtype=float)
+        return bilinear(self.values,
+                        (points[:, 0] - self.x_min) / self.cell_size,
+                        (points[:, 1] - self.y_min) / self.cell_size)
+
+
+def point_segment_dists(walls, point):
+    """Get the distances between a point and every wall segment.
+
+    Args:
+        walls (ndarray): an (N, 4) array of wall segments.
+        point (tuple): (x, y) of the point. The coordinates can be ndarrays of
+            shape (M, 1) for M points.
+
+    Returns:
+        ndarray: the N distances, or (M, N) distances for M points.
+    """
+
+    ex, ey = walls[:, 2] - walls[:, 0], walls[:, 3] - walls[:, 1]
+    wx, wy = point[0] - walls[:, 0], point[1] - walls[:, 1]
+    seg_len_sq = ex**2 + ey**2
+    seg_len_sq = np.broadcast_to(seg_len_sq, np.broadcast(wx, wy).shape)
+    t = np.clip(np.divide(wx * ex + wy * ey, seg_len_sq,
+                          out=np.zeros(seg_len_sq.shape),
+                          where=seg_len_sq != 0), 0, 1)
+    return np.hypot(wx - t * ex, wy - t * ey)
+
+
+def segment_dists(walls, start, end):
+    """Get the distances between a segment and every wall segment. A circle
+    moving from `start` to `end` touches the walls whose distances are not
+    larger than its radius.
+
+    Args:
+        walls (ndarray): an (N, 4) array of wall segments.
+        start (tuple): (x, y) of the start of the segment. The coordinates can
+            be ndarrays of shape (M, 1) for M segments.
+        end (tuple): (x, y) of the end of the segment in the same shape.
+
+    Returns:
+        ndarray: the N distances, or (M, N) distances for M segments, which
+        are 0 for the walls crossing the segment.
+    """
+
+    x1, y1, x2, y2 = walls[:, 0], walls[:, 1], walls[:, 2], walls[:, 3]
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    path_len_sq = np.broadcast_to(dx**2 + dy**2,
+                                  np.broadcast(dx, x1).shape)
+    dists = [point_segment_dists(walls, start),
+             point_segment_dists(walls, end)]
+    # the ends of walls to the segment
+    for px, py in ((x1, y1), (x2, y2)):
+        wx, wy = px - start[0], py - start[1]
+        t = np.clip(np.divide(wx * dx + wy * dy, path_len_sq,
+                              out=np.zeros(path_len_sq.shape),
+                              where=path_len_sq != 0), 0, 1)
+        dists.append(np.hypot(wx - t * dx, wy - t * dy))
+    dists = np.minimum.reduce(dists)
+
+    # the segments cross if the ends of each are on both sides of the other
+    ex, ey = x2 - x1, y2 - y1
+    side1 = dx * (y1 - start[1]) - dy * (x1 - start[0])
+    side2 = dx * (y2 - start[1]) - dy * (x2 - start[0])
+    side3 = ex * (start[1] - y1) - ey * (start[0] - x1)
+    side4 = ex * (end[1] - y1) - ey * (end[0] - x1)
+    crossed = (side1 * side2 < 0) & (side3 * side4 < 0)
+    return np.where(crossed, 0., dists)
+
+
+def is_inside(walls, points):
+    """Check if the points are inside the polygon enclosed by the walls by the
+    even-odd rule.
+
+    Args:
+        walls (ndarray): an (N, 4) array of wall segments.
+        points (ndarray): an (M, 2) array of points.
+
+    Returns:
+        ndarray: M booleans.
+    """
+
+    x, y = points[:, 0:1], points[:, 1:2]
+    x1, y1, x2, y2 = walls[:, 0], walls[:, 1], walls[:, 2], walls[:, 3]
+    # the walls crossing the horizontal line through each point
+    straddle = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.sum(straddle & (x < cross_x), axis=1) % 2 == 1
@@ -0,0 +1,103 @@
+"""Define the precomputed control surface of a two-inputs fuzzy system."""
+
+import numpy as np
+
+from .interpolation import bilinear
+
+
+class ControlSurface(object):
+    def __init__(self, fuzzy_system, x_range, y_range, resolution=101,
+                 error_subdivision=2):
+        """A lookup table of the crisp outputs of a fuzzy system with two
+        antecedents. The fuzzy system is inferred only once on a dense grid,
+        and the queries are answered by bilinear interpolation afterward. The
+        inputs out of the ranges are clipped onto the border of the grid.
+
+        `self.max_error` is a sampled estimate of the maximum interpolation
+        error against the exact inference, not a bound. It is measured on a
+        k x k lattice of sub-points in every cell (the centers and the edge
+        midpoints when k is 2) and a random point in every cell, since the
+        error of an output with kinks may peak anywhere in a cell.
+
+        Args:
+            fuzzy_system (FuzzySystem): the fuzzy system with 2 antecedents.
+            x_range (tuple): (min, max) of the first crisp input.
+            y_range (tuple): (min, max) of the second crisp input.
+            resolution (int or tuple, optional): Defaults to 101. The # of grid
+                points for each input. Use a tuple to specify them separately.
+            error_subdivision (int, optional): Defaults to 2. The k of the
+                lattice of sub-points sampling the error in every cell.
+
+        Raises:
+            IndexError: When the fuzzy system does not have 2 antecedents.
+            ValueError: When the resolution is less than 2.
+        """
+
+        if len(fuzzy_system.antecedents) != 2:
+            raise IndexError("The control surface only supports the fuzzy "
+                             "system with 2 antecedents.")
+        if isinstance(resolution, int):
+            resolution = (resolution, resolution)
+        if min(resolution) < 2:
+            raise ValueError("The resolution must be at least 2.")
+
+        self.fuzzy_system = fuzzy_system
+        self.antecedents = fuzzy_system.antecedents
+        self.xs = np.linspace(x_range[0], x_range[1], resolution[0])
+        self.ys = np.linspace(y_range[0], y_range[1], resolution[1])
+        self.__x_min, self.__y_min = self.xs[0], self.ys[0]
+        self.__x_step = self.xs[1] - self.xs[0]
+        self.__y_step = self.ys[1] - self.ys[0]
+
+        grid = np.stack(np.meshgrid(self.xs, self.ys, indexing='ij'), axis=-1)
+        self.table = fuzzy_system.singleton_result_batch(
+            grid.reshape(-1, 2)).reshape(resolution)
+        self.table.flags.writeable = False
+
+        self.max_error = self.__estimate_error(error_subdivision)
+
+    def singleton_result(self, *inputs):
+        if len(inputs) != 2:
+            raise IndexError("The # of inputs must be the same with "
+                             "'self.antecedents': 2")
+
+        return bilinear(self.table, (inputs[0] - self.__x_min) / self.__x_step,
+                        (inputs[1] - self.__y_min) / self.__y_step)
+
+    def singleton_result_batch(self, inputs):
+        """Get the interpolated crisp outputs of many input vectors at once.
+
+        Args:
+            inputs (array_like): the crisp inputs with the shape of (N, 2).
+
+        Returns:
+            ndarray: the N crisp outputs.
+        """
+
+        inputs = np.asarray(inputs, dtype=float)
+        if inputs.ndim != 2 or inputs.shape[1] != 2:
+            raise IndexError("The # of input columns must be the same with "
+                             "'self.antecedents': 2")
+
+        return bilinear(self.table,
+                        (inputs[:, 0] - self.__x_min) / self.__x_step,
+                        (inputs[:, 1] - self.__y_min) / self.__y_step)
+
+    def __estimate_error(self, subdivision):
+        """Get the maximum error against the exact inference sampled on the
+        lattice of sub-points and a random point in every cell."""
+
+        offsets = np.arange(subdivision) / subdivision
+        lattice = np.stack(np.meshgrid(offsets, offsets, indexing='ij'),
+                           axis=-1).reshape(-1, 2)[1:]  # skip the grid point
+        cells = np.stack(np.meshgrid(np.arange(len(self.xs) - 1),
+                                     np.arange(len(self.ys) - 1),
+                                     indexing='ij'), axis=-1).reshape(-1, 2)
+        random = np.random.RandomState(0).random_sample(cells.shape)
+        samples = np.concatenate([cells + offset for offset in lattice]
+                                 + [cells + random])
+        samples = (np.array([self.__x_min, self.__y_min])
+                   + samples * [self.__x_step, self.__y_step])
+        return float(np.max(np.abs(
+            self.singleton_result_batch(samples)
+            - self.fuzzy_system.singleton_result_batch(samples))))
@@ -0,0 +1,180 @@
+"""Define the recorder of the trajectory of a car and the sinks streaming it
+to disk."""
+
+import os
+
+import numpy as np
+
+from .export import TRAIN4D_COLUMNS, TRAIN6D_COLUMNS, format_rows
+
+# a step of car: the state before moving, the radar distances it reads, the
+# wheel angle it turns to, and the seconds spent on the step
+TRAJECTORY_DTYPE = np.dtype([('x', np.float64), ('y', np.float64),
+                             ('angle', np.float64),
+                             ('wheel_angle', np.float64),
+                             ('front_dist', np.float64),
+                             ('left_dist', np.float64),
+                             ('right_dist', np.float64),
+                             ('step_time', np.float64)])
+
+
+class TrajectoryRecorder(object):
+    def __init__(self, capacity=1024, sinks=(), chunk_size=4096,
+                 retain=True):
+        """The steps of a car in a growable structured array of
+        `TRAJECTORY_DTYPE`. The capacity is doubled whenever it is full, so
+        recording a step takes amortized constant time. The columns are read
+        by name as views without copying, e.g. `recorder['x']`. The recorder
+        owns its sinks, so `close` it, e.g. by a `with` statement, to flush the
+        last steps and close their files.
+
+        Args:
+            capacity (int, optional): Defaults to 1024. The initial # of steps
+                to allocate.
+            sinks (iterable, optional): Defaults to (). The sinks, e.g.
+                `BinarySink` and `TextSink`, which the steps are written into
+                every `chunk_size` steps while recording.
+            chunk_size (int, optional): Defaults to 4096. The # of steps
+                written into the sinks at once.
+            retain (bool, optional): Defaults to True. If False, the steps
+                written into the sinks are dropped from the memory, so at
+                most `chunk_size` steps are kept.
+        """
+
+        self.__data = np.empty(max(1, capacity), dtype=TRAJECTORY_DTYPE)
+        self.__size = 0
+        self.__written = 0
+        self.sinks = list(sinks)
+        self.chunk_size = chunk_size
+        self.retain = retain
+        self.total = 0
+
+    def __len__(self):
+        return self.__size
+
+    def __getitem__(self, key):
+        return self.records[key]
+
+    @property
+    def records(self):
+        """The view of the steps kept in the memory, which is invalidated by
+        the next growing of capacity. They are all the recorded steps unless
+        `retain` is False."""
+        return self.__data[:self.__size]
+
+    def append(self, x, y, angle, wheel_angle, front_dist, left_dist,
+               right_dist, step_time=0.):
+        """Record a step in the order of the fields of `TRAJECTORY_DTYPE`."""
+        if self.__size == len(self.__data):
+            data = np.empty(2 * len(self.__data), dtype=TRAJECTORY_DTYPE)
+            data[:self.__size] = self.__data
+            self.__data = data
+        self.__data[self.__size] = (x, y, angle, wheel_angle, front_dist,
+                                    left_dist, right_dist, step_time)
+        self.__size += 1
+        self.total += 1
+        if self.sinks and self.__size - self.__written >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the steps not written yet into the sinks."""
+        chunk = self.__data[self.__written:self.__size]
+        if len(chunk):
+            for sink in self.sinks:
+                sink.write(chunk)
+        self.__written = self.__size
+        if not self.retain:
+            self.__size = self.__written = 0
+
+    def close(self):
+        """Flush the steps and close the sinks."""
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def clear(self):
+        """Remove all the recorded steps and keep the capacity."""
+        self.__size = self.__written = 0
+        self.total = 0
+
+
+class BinarySink(object):
+    def __init__(self, path):
+        """Stream the raw records of `TRAJECTORY_DTYPE` into a file, which is
+        read by `read_binary`.
+
+        Args:
+            path (string): the path of file, which is overwritten.
+        """
+
+        self.path = path
+        self.__file = open(path, 'wb')
+
+    def write(self, records):
+        self.__file.write(records.tobytes())
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TextSink(object):
+    def __init__(self, path4d=None, path6d=None):
+        """Stream the steps in the train4D and train6D text formats.
+
+        Args:
+            path4d (string, optional): Defaults to None. The path of the
+                train4D file with the front, right, left distances and the
+                wheel angle.
+            path6d (string, optional): Defaults to None. The path of the
+                train6D file with x, y in front of the columns of train4D.
+        """
+
+        self.__files = []
+        if path4d is not None:
+            self.__files.append((open(path4d, 'w'), TRAIN4D_COLUMNS))
+        if path6d is not None:
+            self.__files.append((open(path6d, 'w'), TRAIN6D_COLUMNS))
+
+    def write(self, records):
+        for file, columns in self.__files:
+            file.write(format_rows(
+                np.column_stack([records[c] for c in columns])))
+            file.flush()
+
+    def close(self):
+        for file, _ in self.__files:
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_binary(path):
+    """Read the records written by `BinarySink`. The incomplete record at the
+    end, left by a killed process, is ignored.
+
+    Args:
+        path (string): the path of file.
+
+    Returns:
+        ndarray: the records of `TRAJECTORY_DTYPE`.
+    """
+
+    count = os.path.getsize(path) // TRAJECTORY_DTYPE.itemsize
+    return np.fromfile(path, dtype=TRAJECTORY_DTYPE, count=count)
@@ -2,7 +2,7 @@
 
 import collections
 import itertools
-import os
+import math
 
 from PySide2.QtCore import Qt, Slot, Signal
 from PySide2.QtGui import QIcon
@@ -11,14 +11,16 @@ from PySide2.QtWidgets import (QFrame, QHBoxLayout, QVBoxLayout, QFormLayout,
                                QPushButton, QLabel, QRadioButton, QTextEdit,
                                QCheckBox, QStackedWidget, QTableWidget,
                                QTableWidgetItem, QHeaderView, QSpinBox,
-                               QFileDialog)
+                               QFileDialog, QProgressBar)
 
 from .display_panel import DisplayFrame
 from .fuzzier_viewer import FuzzierViewer
 from ..backend.fuzzy_system import (FuzzySystem, FuzzyVariable,
-                                            get_gaussianf)
+                                    TSKConsequence)
+from ..backend.membership import GaussianMF
 from ..backend.car import Car
-from ..backend.run import RunCar
+from ..backend.export import EXPORTERS
+from ..backend.run import BuildControlSurface, ExportResults, RunCar
 from . import src  # for pyinstaller to import the icons automatically
 
 
@@ -33,6 +35,7 @@ class ControlFrame(QFrame):
                             "'DisplayFrame'")
         self.dataset = dataset
         self.threads = threads
+        self.results = None
 
         self.__layout = QVBoxLayout()
         self.setLayout(self.__layout)
@@ -61,6 +64,27 @@ class ControlFrame(QFrame):
         self.fps.setStatusTip("The re-drawing rate for car simulator. High fps "
                               "may cause the plot shows discontinuously.")
 
+        self.speed = QSpinBox()
+        self.speed.setRange(0, 100)
+        self.speed.setValue(1)
+        self.speed.setSuffix("x")
+        self.speed.setSpecialValueText("Max")
+        self.speed.setStatusTip("The # of simulation steps per frame. The "
+                                "steps between frames are not drawn. Max runs "
+                                "the simulation as fast as possible.")
+
+        self.lookup_table = QCheckBox("Lookup Table")
+        self.lookup_table.setStatusTip("Precompute the control surface of the "
+                                       "fuzzy system and interpolate it while "
+                                       "running.")
+        self.lookup_resolution = QSpinBox()
+        self.lookup_resolution.setRange(2, 1001)
+        self.lookup_resolution.setValue(201)
+        self.lookup_resolution.setStatusTip("The # of grid points of each "
+                                            "input for the lookup table, "
+                                            "whose building time grows with "
+                                            "its square.")
+
         self.start_btn = QPushButton("Run")
         self.start_btn.setStatusTip("Run the car.")
         self.start_btn.clicked.connect(self.__run)
@@ -76,13 +100,28 @@ class ControlFrame(QFrame):
         self.save_btn.clicked.connect(self.__save_results)
         self.save_btn.setDisabled(True)
 
+        self.export_format = QComboBox()
+        self.export_format.addItems(list(EXPORTERS.keys()))
+        self.export_format.setStatusTip("The saving format: train4D/train6D "
+                                        "text, a NumPy structured array, or "
+                                        "NumPy arrays of every column.")
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 100)
+        self.export_progress.setStatusTip("The progress of saving.")
+
         self.__change_map()
         inner_layout.addWidget(self.data_selector, 1)
         inner_layout.addWidget(QLabel("FPS:"))
         inner_layout.addWidget(self.fps)
+        inner_layout.addWidget(QLabel("Speed:"))
+        inner_layout.addWidget(self.speed)
+        inner_layout.addWidget(self.lookup_table)
+        inner_layout.addWidget(self.lookup_resolution)
         inner_layout.addWidget(self.start_btn)
         inner_layout.addWidget(self.stop_btn)
         inner_layout.addWidget(self.save_btn)
+        inner_layout.addWidget(self.export_format)
+        inner_layout.addWidget(self.export_progress)
 
         self.__layout.addWidget(group_box)
 
@@ -91,6 +130,10 @@ class ControlFrame(QFrame):
         inner_layout = QFormLayout()
         group_box.setLayout(inner_layout)
 
+        self.inference_selections = RadioButtonSet([
+            ("mamdani", QRadioButton("Mamdani")),
+            ("tsk", QRadioButton("Takagi-Sugeno"))
+        ])
         self.implication_selections = RadioButtonSet([
             ("imp_dr", QRadioButton("Dienes-Rescher")),
             ("imp_l", QRadioButton("Lukasieweicz")),
@@ -117,11 +160,18 @@ class ControlFrame(QFrame):
             ("modified_maxima_mean", QRadioButton("Modified Mean of Maxima"))
         ])
 
+        self.inference_selections.set_selected('mamdani')
         self.implication_selections.set_selected('imp_m')
         self.combination_vars_selections.set_selected('tn_min')
         self.combination_rules_selections.set_selected('tc_max')
         self.defuzzifier_selections.set_selected('gravity_center')
 
+        self.inference_selections.setStatusTip("Choose the type of inference. "
+                                               "Takagi-Sugeno uses the mean "
+                                               "of each consequence fuzzy set "
+                                               "as its crisp output.")
+        self.inference_selections.sig_rbtn_changed.connect(
+            self.__change_inference)
         self.implication_selections.setStatusTip("Choose the method for fuzzy "
                                                  "implication.")
         self.combination_vars_selections.setStatusTip("Choose the method of "
@@ -133,6 +183,8 @@ class ControlFrame(QFrame):
         self.defuzzifier_selections.setStatusTip("Choose the method for the "
                                                  "defuzifier.")
 
+        inner_layout.addRow(QLabel("Inference:"),
+                            self.inference_selections)
         inner_layout.addRow(QLabel("Implication:"),
                             self.implication_selections)
         inner_layout.addRow(QLabel("Combination of Variables:"),
@@ -189,14 +241,15 @@ class ControlFrame(QFrame):
         self.__layout.addWidget(group_box)
 
     def __set_fuzzy_rules_ui(self):
-        antecedents = ('small', 'medium', 'large')
+        fuzzy_sets = ('small', 'medium', 'large')
 
         group_box = QGroupBox("Fuzzy Rules Setting")
         inner_layout = QVBoxLayout()
         group_box.setStatusTip("Set the rules for the fuzzy system.")
 
         self.rules_setting = FuzzyRulesSetting(
-            [p for p in itertools.product(antecedents, repeat=2)])
+            (fuzzy_sets, fuzzy_sets), fuzzy_sets,
+            ('Front Dist.', '(Left-Right) Dist.'))
         self.rules_setting.set_consequence_fuzzysets((
             'large', 'small', 'small',
             'large', 'small', 'small',
@@ -222,6 +275,14 @@ class ControlFrame(QFrame):
         else:
             self.fuzzyvar_setting_stack.setCurrentIndex(2)
 
+    @Slot(str)
+    def __change_inference(self, name):
+        """Only the combination of variables is used by TSK inference."""
+        is_mamdani = name == 'mamdani'
+        self.implication_selections.setEnabled(is_mamdani)
+        self.combination_rules_selections.setEnabled(is_mamdani)
+        self.defuzzifier_selections.setEnabled(is_mamdani)
+
     @Slot()
     def __change_map(self):
         self.__current_data = self.dataset[self.data_selector.currentText()]
@@ -234,34 +295,31 @@ class ControlFrame(QFrame):
     def __print_console(self, text):
         self.__console.append(text)
 
-    @Slot(list)
+    @Slot(object)
     def __get_results(self, results):
-        """Get the results of last running and draw the path of it."""
+        """Get the trajectory of last running and draw the path of it."""
         self.results = results
-        self.display_panel.show_path([d['x'] for d in results],
-                                     [d['y'] for d in results])
+        self.display_panel.show_path(results['x'], results['y'])
 
     @Slot()
     def __save_results(self):
         save_dir = QFileDialog.getExistingDirectory(self,
                                                     'Select Saving Directory')
-        file4d_filepath = os.path.join(save_dir, 'train4D.txt')
-        file6d_filepath = os.path.join(save_dir, 'train6D.txt')
-        with open(file4d_filepath, 'w') as file4d:
-            for result in self.results:
-                file4d.write('{:.7f} {:.7f} {:.7f} {:.7f}\n'.format(
-                    result['front_dist'], result['right_dist'],
-                    result['left_dist'], result['wheel_angle']
-                ))
-        with open(file6d_filepath, 'w') as file6d:
-            for result in self.results:
-                file6d.write('{:.7f} {:.7f} {:.7f} {:.7f} {:.7f} {:.7f}\n'.format(
-                    result['x'], result['y'],
-                    result['front_dist'], result['right_dist'],
-                    result['left_dist'], result['wheel_angle']
-                ))
-        self.__print_console('Note: Detailed results have been saved in both'
-                             ' "%s" and "%s".' % (file4d_filepath, file6d_filepath))
+        if not save_dir:
+            return
+        self.export_thread = ExportResults(self.results.records, save_dir,
+                                           self.export_format.currentText())
+        self.threads.append(self.export_thread)
+        self.export_thread.finished.connect(self.__finish_saving)
+        self.export_thread.sig_console.connect(self.__print_console)
+        self.export_thread.sig_progress.connect(self.export_progress.setValue)
+        self.export_progress.setValue(0)
+        self.save_btn.setDisabled(True)
+        self.export_thread.start()
+
+    @Slot()
+    def __finish_saving(self):
+        self.save_btn.setEnabled(True)
 
     @Slot()
     def __init_widgets(self):
@@ -269,7 +327,11 @@ class ControlFrame(QFrame):
         self.stop_btn.setEnabled(True)
         self.save_btn.setDisabled(True)
         self.fps.setDisabled(True)
+        self.speed.setDisabled(True)
+        self.lookup_table.setDisabled(True)
+        self.lookup_resolution.setDisabled(True)
         self.data_selector.setDisabled(True)
+        self.inference_selections.setDisabled(True)
         self.implication_selections.setDisabled(True)
         self.combination_vars_selections.setDisabled(True)
         self.combination_rules_selections.setDisabled(True)
@@ -285,11 +347,13 @@ class ControlFrame(QFrame):
         self.stop_btn.setDisabled(True)
         self.save_btn.setEnabled(True)
         self.fps.setEnabled(True)
+        self.speed.setEnabled(True)
+        self.lookup_table.setEnabled(True)
+        self.lookup_resolution.setEnabled(True)
         self.data_selector.setEnabled(True)
-        self.implication_selections.setEnabled(True)
+        self.inference_selections.setEnabled(True)
         self.combination_vars_selections.setEnabled(True)
-        self.combination_rules_selections.setEnabled(True)
-        self.defuzzifier_selections.setEnabled(True)
+        self.__change_inference(self.inference_selections.get_selected_name())
         self.fuzzyvar_setting_dist_front.setEnabled(True)
         self.fuzzyvar_setting_dist_lrdiff.setEnabled(True)
         self.fuzzyvar_setting_consequence.setEnabled(True)
@@ -299,12 +363,29 @@ class ControlFrame(QFrame):
     def __run(self):
         # reset the map
         self.__change_map()
+        fuzzy_system = self.__create_fuzzy_system()
+        if self.lookup_table.isChecked():
+            self.__build_control_surface(fuzzy_system)
+        else:
+            self.__start_car(fuzzy_system)
+
+    @Slot()
+    def __finish_building(self):
+        if self.build_thread.surface is None:
+            self.__reset_widgets()
+            # no results to save if the build is stopped before any running
+            self.save_btn.setEnabled(self.results is not None)
+        else:
+            self.__start_car(self.build_thread.surface)
+
+    def __start_car(self, fuzzy_system):
         # create a QThread
         self.thread = RunCar(self.__car,
-                             self.__create_fuzzy_system(),
+                             fuzzy_system,
                              (self.__current_data['end_area_lt'],
                               self.__current_data['end_area_rb']),
-                             self.fps.value())
+                             self.fps.value(),
+                             self.speed.value())
         # Record the new created threads for the closeEvent in gui_base.py
         # By doing this, user can destroy the QMainWindow elegantly when there
         # are threads still running.
@@ -324,40 +405,68 @@ class ControlFrame(QFrame):
         """Create a fuzzy system with the parameter given in control panel."""
         dist_front = FuzzyVariable()
         dist_front.add_membershipf(
-            'small', get_gaussianf(*self.fuzzyvar_setting_dist_front.small.get_values()))
+            'small', GaussianMF(*self.fuzzyvar_setting_dist_front.small.get_values()))
         dist_front.add_membershipf(
-            'medium', get_gaussianf(*self.fuzzyvar_setting_dist_front.medium.get_values()))
+            'medium', GaussianMF(*self.fuzzyvar_setting_dist_front.medium.get_values()))
         dist_front.add_membershipf(
-            'large', get_gaussianf(*self.fuzzyvar_setting_dist_front.large.get_values()))
+            'large', GaussianMF(*self.fuzzyvar_setting_dist_front.large.get_values()))
 
         dist_lrdiff = FuzzyVariable()
         dist_lrdiff.add_membershipf(
-            'small', get_gaussianf(*self.fuzzyvar_setting_dist_lrdiff.small.get_values()))
+            'small', GaussianMF(*self.fuzzyvar_setting_dist_lrdiff.small.get_values()))
         dist_lrdiff.add_membershipf(
-            'medium', get_gaussianf(*self.fuzzyvar_setting_dist_lrdiff.medium.get_values()))
+            'medium', GaussianMF(*self.fuzzyvar_setting_dist_lrdiff.medium.get_values()))
         dist_lrdiff.add_membershipf(
-            'large', get_gaussianf(*self.fuzzyvar_setting_dist_lrdiff.large.get_values()))
-
-        consequence = FuzzyVariable()
-        consequence.add_membershipf(
-            'small', get_gaussianf(*self.fuzzyvar_setting_consequence.small.get_values()))
-        consequence.add_membershipf(
-            'medium', get_gaussianf(*self.fuzzyvar_setting_consequence.medium.get_values()))
-        consequence.add_membershipf(
-            'large', get_gaussianf(*self.fuzzyvar_setting_consequence.large.get_values()))
+            'large', GaussianMF(*self.fuzzyvar_setting_dist_lrdiff.large.get_values()))
+
+        inference = self.inference_selections.get_selected_name()
+        if inference == 'tsk':
+            consequence = TSKConsequence()
+            consequence.add_output(
+                'small', self.fuzzyvar_setting_consequence.small.mean.value())
+            consequence.add_output(
+                'medium', self.fuzzyvar_setting_consequence.medium.mean.value())
+            consequence.add_output(
+                'large', self.fuzzyvar_setting_consequence.large.mean.value())
+        else:
+            consequence = FuzzyVariable()
+            consequence.add_membershipf(
+                'small', GaussianMF(*self.fuzzyvar_setting_consequence.small.get_values()))
+            consequence.add_membershipf(
+                'medium', GaussianMF(*self.fuzzyvar_setting_consequence.medium.get_values()))
+            consequence.add_membershipf(
+                'large', GaussianMF(*self.fuzzyvar_setting_consequence.large.get_values()))
 
         fuzzy_system = FuzzySystem(consequence, dist_front, dist_lrdiff)
         fuzzy_system.set_operation_types(
             self.implication_selections.get_selected_name(),
             self.combination_vars_selections.get_selected_name(),
             self.combination_rules_selections.get_selected_name(),
-            self.defuzzifier_selections.get_selected_name())
+            self.defuzzifier_selections.get_selected_name(),
+            inference)
 
         for antecendent_names, consequence_name in self.rules_setting.rules.items():
             fuzzy_system.add_rule(consequence_name, antecendent_names)
+        fuzzy_system.compile()
 
         return fuzzy_system
 
+    def __build_control_surface(self, fuzzy_system):
+        """Build the lookup table of the fuzzy system covering every possible
+        radar distance in current map in a thread, and start the car with it
+        when it is built."""
+        xs, ys = zip(*self.__current_data['route_edge'])
+        max_dist = math.hypot(max(xs) - min(xs), max(ys) - min(ys))
+        self.build_thread = BuildControlSurface(
+            fuzzy_system, (0, max_dist), (-max_dist, max_dist),
+            self.lookup_resolution.value())
+        self.threads.append(self.build_thread)
+        self.stop_btn.clicked.connect(self.build_thread.stop)
+        self.build_thread.started.connect(self.__init_widgets)
+        self.build_thread.finished.connect(self.__finish_building)
+        self.build_thread.sig_console.connect(self.__print_console)
+        self.build_thread.start()
+
 
 class RadioButtonSet(QFrame):
     """A set of QRadioButton.
@@ -491,13 +600,22 @@ class GaussianFuzzierSetting(QFrame):
 
 
 class FuzzyRulesSetting(QTableWidget):
-    def __init__(self, antecedent_product):
-        super().__init__(
-            len(antecedent_product[0]) + 1, len(antecedent_product))
+    def __init__(self, antecedent_names, consequence_names, labels):
+        """The table of fuzzy rules for every combination of the antecedent
+        fuzzy sets.
+
+        Args:
+            antecedent_names (sequence): the fuzzy set names of each
+                antecedent.
+            consequence_names (sequence): the fuzzy set names of consequence.
+            labels (sequence): the label of each antecedent.
+        """
+
+        antecedent_product = list(itertools.product(*antecedent_names))
+        super().__init__(len(antecedent_names) + 1, len(antecedent_product))
         self.horizontalHeader().hide()
         self.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.setVerticalHeaderLabels(
-            ['Front Dist.', '(Left-Right) Dist.', 'Consequence'])
+        self.setVerticalHeaderLabels(list(labels) + ['Consequence'])
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.rules_selections = collections.OrderedDict()
 
@@ -508,11 +626,11 @@ class FuzzyRulesSetting(QTableWidget):
                 item.setTextAlignment(Qt.AlignCenter)
                 self.setItem(row, col, item)
             combobox = QComboBox()
-            combobox.addItems(['small', 'medium', 'large'])
+            combobox.addItems(list(consequence_names))
             self.rules_selections[antecedents] = combobox
 
         for col, consequence in enumerate(self.rules_selections.values()):
-            self.setCellWidget(2, col, consequence)
+            self.setCellWidget(len(antecedent_names), col, consequence)
 
     @property
     def rules(self):